@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Async browser session management with extension support.
+
+Uses aiobotocore so many browser sessions can be started and stopped from a
+single event loop, without blocking a thread per API call.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import AsyncExitStack
+from typing import Optional, List, Dict
+from aiobotocore.session import get_session
+from rich.console import Console
+
+from browser_with_extension import (
+    BROWSER_IDENTIFIER,
+    SESSION_TIMEOUT_SECONDS,
+    build_extensions_config,
+)
+
+console = Console()
+
+
+class AsyncBrowserWithExtension:
+    """Manage AgentCore Browser sessions with extensions from asyncio code.
+    
+    A single aiobotocore client is kept open for the lifetime of the manager
+    so every call reuses the same warm TLS connection pool.
+    
+    Usage:
+        async with AsyncBrowserWithExtension() as browser:
+            sessions = await browser.create_browser_sessions(configs)
+    """
+    
+    def __init__(self, region: Optional[str] = None):
+        """Initialize async browser manager.
+        
+        Args:
+            region: AWS region (uses AWS_REGION env var if None)
+        """
+        self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
+        self.agentcore_client = None
+        self.sessions: List[Dict] = []  # Active sessions, oldest first
+        self._exit_stack: Optional[AsyncExitStack] = None
+    
+    async def open(self):
+        """Open the shared aiobotocore client (idempotent)."""
+        if self.agentcore_client is not None:
+            return
+        
+        self._exit_stack = AsyncExitStack()
+        self.agentcore_client = await self._exit_stack.enter_async_context(
+            get_session().create_client('bedrock-agentcore', region_name=self.region)
+        )
+    
+    async def close(self):
+        """Close the shared aiobotocore client."""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self.agentcore_client = None
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        """Session ID of the most recently created active session, if any."""
+        return self.sessions[-1]['session_id'] if self.sessions else None
+    
+    async def create_browser_session(
+        self,
+        extension_s3_uris: List[str],
+        session_name: Optional[str] = None
+    ) -> Dict:
+        """Create a browser session with extensions.
+        
+        Args:
+            extension_s3_uris: List of S3 URIs for extensions (format: s3://bucket/key)
+            session_name: Optional session name (auto-generated if None)
+        
+        Returns:
+            Browser session details
+        """
+        sessions = await self.create_browser_sessions([{
+            'extension_s3_uris': extension_s3_uris,
+            'session_name': session_name
+        }])
+        return sessions[0]
+    
+    async def create_browser_sessions(self, configs: List[Dict]) -> List[Dict]:
+        """Create several browser sessions concurrently with asyncio.gather.
+        
+        Args:
+            configs: One dict per session with 'extension_s3_uris' and an
+                optional 'session_name' (auto-generated if missing)
+        
+        Returns:
+            Browser session details, in the same order as configs
+        """
+        if not configs:
+            return []
+        
+        await self.open()
+        
+        timestamp = int(time.time())
+        requests = []
+        for index, config in enumerate(configs, 1):
+            session_name = config.get('session_name')
+            if not session_name:
+                session_name = f"extension-demo-{timestamp}"
+                if len(configs) > 1:
+                    session_name += f"-{index}"
+            requests.append((session_name, config['extension_s3_uris']))
+        
+        console.print(f"[dim]Starting {len(requests)} browser session(s) in {self.region}...[/dim]")
+        
+        responses = await asyncio.gather(
+            *(self._start_session(name, uris) for name, uris in requests),
+            return_exceptions=True
+        )
+        
+        results = []
+        errors = []
+        for (session_name, extension_s3_uris), response in zip(requests, responses):
+            if isinstance(response, Exception):
+                console.print(f"[red]✗[/red] Failed to create browser session {session_name}: {response}")
+                errors.append(response)
+                continue
+            
+            session_id = response['sessionId']
+            self.sessions.append({
+                'session_id': session_id,
+                'session_name': session_name,
+                'region': self.region
+            })
+            console.print(f"[green]✓[/green] Browser session created: {session_name} ({session_id})")
+            
+            results.append({
+                'session_id': session_id,
+                'region': self.region,
+                'extensions': extension_s3_uris,
+                'status': 'active'
+            })
+        
+        if errors:
+            # Sessions that did start stay tracked so close_session() stops them
+            raise errors[0]
+        
+        return results
+    
+    async def _start_session(self, session_name: str, extension_s3_uris: List[str]) -> Dict:
+        """Start a single browser session.
+        
+        Args:
+            session_name: Session name
+            extension_s3_uris: List of S3 URIs for extensions
+        
+        Returns:
+            StartBrowserSession response
+        """
+        return await self.agentcore_client.start_browser_session(
+            browserIdentifier=BROWSER_IDENTIFIER,
+            name=session_name,
+            sessionTimeoutSeconds=SESSION_TIMEOUT_SECONDS,
+            extensions=build_extensions_config(extension_s3_uris)
+        )
+    
+    async def close_session(self):
+        """Stop all browser sessions created by this manager concurrently."""
+        if not self.sessions or self.agentcore_client is None:
+            return
+        
+        sessions = list(self.sessions)
+        responses = await asyncio.gather(
+            *(
+                self.agentcore_client.stop_browser_session(
+                    browserIdentifier=BROWSER_IDENTIFIER,
+                    sessionId=session['session_id']
+                )
+                for session in sessions
+            ),
+            return_exceptions=True
+        )
+        
+        for session, response in zip(sessions, responses):
+            if isinstance(response, Exception):
+                console.print(f"[yellow]⚠[/yellow] Error stopping session {session['session_id']}: {response}")
+            else:
+                console.print(f"[green]✓[/green] Browser session stopped: {session['session_id']}")
+                self.sessions.remove(session)
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        try:
+            await self.close_session()
+        finally:
+            await self.close()
+
+
+if __name__ == "__main__":
+    # Test async browser creation
+    import sys
+    
+    if len(sys.argv) < 2:
+        print("Usage: python async_browser_with_extension.py <s3://bucket/key> [count]")
+        sys.exit(1)
+    
+    s3_uri = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    
+    async def _demo():
+        async with AsyncBrowserWithExtension() as browser:
+            sessions = await browser.create_browser_sessions(
+                [{'extension_s3_uris': [s3_uri]} for _ in range(count)]
+            )
+            for session in sessions:
+                print(f"Browser session created: {session['session_id']}")
+    
+    asyncio.run(_demo())
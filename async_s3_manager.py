@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Async S3 bucket management for extension storage.
+
+Uses aiobotocore so several extensions can be uploaded and verified from a
+single event loop, with multipart parts sent concurrently.
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Optional, List
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+from rich.console import Console
+
+from s3_manager import (
+    CONTENT_SHA256_METADATA,
+    IMMUTABLE_CACHE_CONTROL,
+    MAX_TRANSFER_CONCURRENCY,
+    MULTIPART_CHUNKSIZE,
+    MULTIPART_THRESHOLD,
+    content_key,
+    file_sha256,
+)
+
+console = Console()
+
+
+def _read_part(path: Path, offset: int, size: int) -> bytes:
+    """Read one multipart part from a file."""
+    with path.open('rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+class AsyncS3Manager:
+    """Manage the S3 extension bucket from asyncio code.
+    
+    A single aiobotocore client is kept open for the lifetime of the manager.
+    
+    Usage:
+        async with AsyncS3Manager(bucket_name) as manager:
+            s3_uris = await manager.setup_and_upload_all(paths)
+    """
+    
+    def __init__(self, bucket_name: str, region: Optional[str] = None):
+        """Initialize async S3 manager.
+        
+        Args:
+            bucket_name: S3 bucket name
+            region: AWS region (uses AWS_REGION env var if None)
+        """
+        self.bucket_name = bucket_name
+        self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
+        self.s3_client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._bucket_verified = False  # Set once create_bucket() succeeds
+        # Bounds concurrent part uploads across all files
+        self._part_semaphore = asyncio.Semaphore(MAX_TRANSFER_CONCURRENCY)
+    
+    async def open(self):
+        """Open the shared aiobotocore client (idempotent)."""
+        if self.s3_client is not None:
+            return
+        
+        self._exit_stack = AsyncExitStack()
+        self.s3_client = await self._exit_stack.enter_async_context(
+            get_session().create_client('s3', region_name=self.region)
+        )
+    
+    async def close(self):
+        """Close the shared aiobotocore client."""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self.s3_client = None
+    
+    async def bucket_exists(self) -> bool:
+        """Check if bucket exists.
+        
+        Returns:
+            True if bucket exists
+        """
+        try:
+            await self.s3_client.head_bucket(Bucket=self.bucket_name)
+            return True
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == '404':
+                return False
+            elif error_code == '403':
+                console.print(f"[yellow]⚠ Bucket exists but access denied: {self.bucket_name}[/yellow]")
+                return True
+            else:
+                raise
+    
+    async def create_bucket(self) -> bool:
+        """Create S3 bucket if it doesn't exist (checked once per manager).
+        
+        Returns:
+            True if bucket was created or already exists
+        """
+        if self._bucket_verified:
+            return True
+        
+        await self.open()
+        console.print(f"[cyan]Checking S3 bucket: {self.bucket_name}[/cyan]")
+        
+        if await self.bucket_exists():
+            console.print(f"[green]✓[/green] Bucket already exists: {self.bucket_name}")
+            self._bucket_verified = True
+            return True
+        
+        console.print(f"[cyan]Creating S3 bucket: {self.bucket_name}[/cyan]")
+        
+        try:
+            if self.region == 'us-east-1':
+                # us-east-1 doesn't need LocationConstraint
+                await self.s3_client.create_bucket(Bucket=self.bucket_name)
+            else:
+                await self.s3_client.create_bucket(
+                    Bucket=self.bucket_name,
+                    CreateBucketConfiguration={'LocationConstraint': self.region}
+                )
+            console.print(f"[green]✓[/green] Bucket created: {self.bucket_name}")
+        
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == 'BucketAlreadyOwnedByYou':
+                console.print(f"[green]✓[/green] Bucket already owned by you: {self.bucket_name}")
+            elif error_code == 'BucketAlreadyExists':
+                console.print(f"[red]✗[/red] Bucket name already taken: {self.bucket_name}")
+                console.print("[yellow]Try a different bucket name[/yellow]")
+                return False
+            else:
+                console.print(f"[red]✗[/red] Failed to create bucket: {e}")
+                raise
+        
+        self._bucket_verified = True
+        return True
+    
+    async def upload_extension(self, extension_path: Path, key: Optional[str] = None) -> str:
+        """Upload extension zip to S3, skipping it if S3 already holds the same bytes.
+        
+        Args:
+            extension_path: Path to extension zip file
+            key: S3 object key (content-addressed extensions/<sha256>.zip
+                if None, as in S3Manager)
+        
+        Returns:
+            S3 URI of uploaded extension
+        """
+        await self.open()
+        digest = await asyncio.to_thread(file_sha256, extension_path)
+        if key is None:
+            key = content_key(digest, extension_path.suffix)
+        s3_uri = f"s3://{self.bucket_name}/{key}"
+        
+        try:
+            response = await self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            if response.get('Metadata', {}).get(CONTENT_SHA256_METADATA) == digest:
+                console.print(f"[green]✓[/green] Extension unchanged, skipping upload: {s3_uri}")
+                return s3_uri
+        except ClientError:
+            pass
+        
+        file_size = extension_path.stat().st_size
+        console.print(f"[dim]Uploading {extension_path.name} ({file_size / 1024 / 1024:.2f} MB)...[/dim]")
+        
+        object_args = {
+            'Bucket': self.bucket_name,
+            'Key': key,
+            'ContentType': 'application/zip',
+            'CacheControl': IMMUTABLE_CACHE_CONTROL,
+            'Metadata': {CONTENT_SHA256_METADATA: digest},
+        }
+        try:
+            if file_size < MULTIPART_THRESHOLD:
+                body = await asyncio.to_thread(extension_path.read_bytes)
+                await self.s3_client.put_object(Body=body, **object_args)
+            else:
+                await self._multipart_upload(extension_path, file_size, object_args)
+        except Exception as e:
+            console.print(f"[red]✗[/red] Failed to upload {extension_path.name}: {e}")
+            raise
+        
+        console.print(f"[green]✓[/green] Extension uploaded: {s3_uri}")
+        return s3_uri
+    
+    async def _multipart_upload(self, extension_path: Path, file_size: int, object_args: dict):
+        """Upload a large file as concurrent multipart parts.
+        
+        Args:
+            extension_path: Path to extension zip file
+            file_size: Size of the file in bytes
+            object_args: Bucket, Key and object attributes for the upload
+        """
+        upload = await self.s3_client.create_multipart_upload(**object_args)
+        upload_id = upload['UploadId']
+        
+        async def upload_part(part_number: int, offset: int) -> dict:
+            async with self._part_semaphore:
+                body = await asyncio.to_thread(_read_part, extension_path, offset, MULTIPART_CHUNKSIZE)
+                response = await self.s3_client.upload_part(
+                    Bucket=object_args['Bucket'],
+                    Key=object_args['Key'],
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body
+                )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        
+        tasks = [
+            asyncio.create_task(upload_part(part_number, offset))
+            for part_number, offset in enumerate(range(0, file_size, MULTIPART_CHUNKSIZE), 1)
+        ]
+        try:
+            parts = await asyncio.gather(*tasks)
+            await self.s3_client.complete_multipart_upload(
+                Bucket=object_args['Bucket'],
+                Key=object_args['Key'],
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            # gather leaves the other parts running when one fails; stop them
+            # first so no part lands after the abort
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self.s3_client.abort_multipart_upload(
+                    Bucket=object_args['Bucket'],
+                    Key=object_args['Key'],
+                    UploadId=upload_id
+                )
+            except Exception as abort_error:
+                # Report it, but keep the part/complete failure as the error
+                console.print(f"[yellow]⚠ Failed to abort multipart upload {upload_id}: {abort_error}[/yellow]")
+            raise
+    
+    async def setup_and_upload_all(self, extension_paths: List[Path]) -> Optional[List[str]]:
+        """Create the bucket once, then upload all extensions concurrently.
+        
+        Args:
+            extension_paths: Paths to extension zip files
+        
+        Returns:
+            S3 URIs in the same order as extension_paths, or None if any failed
+        """
+        if not await self.create_bucket():
+            return None
+        
+        results = await asyncio.gather(
+            *(self.upload_extension(path) for path in extension_paths),
+            return_exceptions=True
+        )
+        if any(isinstance(result, Exception) for result in results):
+            return None
+        
+        console.print("\n[green]✓ S3 setup complete![/green]\n")
+        return list(results)
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
+
+
+if __name__ == "__main__":
+    # Test async S3 manager
+    if len(sys.argv) < 2:
+        print("Usage: python async_s3_manager.py <extension.zip> [extension.zip ...]")
+        sys.exit(1)
+    
+    extension_paths = [Path(arg) for arg in sys.argv[1:]]
+    missing = [path for path in extension_paths if not path.exists()]
+    if missing:
+        print(f"Error: File not found: {missing[0]}")
+        sys.exit(1)
+    
+    bucket_name = os.environ.get('S3_BUCKET_NAME', 'browser-extension-demo-zihangh-20260129')
+    
+    async def _demo():
+        async with AsyncS3Manager(bucket_name) as manager:
+            return await manager.setup_and_upload_all(extension_paths)
+    
+    s3_uris = asyncio.run(_demo())
+    if s3_uris:
+        for s3_uri in s3_uris:
+            print(f"Success! Extension uploaded to: {s3_uri}")
+    else:
+        print("\nFailed to upload extensions")
+        sys.exit(1)
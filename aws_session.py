@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Process-wide boto3 session shared by the S3 and browser modules."""
+
+import functools
+import threading
+from typing import TYPE_CHECKING, Optional
+
+# boto3 is imported lazily: importing it costs ~150 ms, which callers that
+# never create a client shouldn't pay
+if TYPE_CHECKING:
+    import boto3
+
+# Refresh windows for temporary credentials (botocore defaults: 15 and 10
+# minutes). With short-lived AssumeRole/SSO/web-identity credentials the
+# defaults make nearly every call refresh; these keep refreshes to once
+# per credential lifetime. botocore has no public setting for these; they
+# are applied through RefreshableCredentials' private attributes, and only
+# where those attributes exist.
+ADVISORY_REFRESH_SECONDS = 120
+MANDATORY_REFRESH_SECONDS = 60
+
+# RefreshableCredentials attribute (botocore internal) -> window applied
+_REFRESH_TIMEOUT_ATTRIBUTES = {
+    '_advisory_refresh_timeout': ADVISORY_REFRESH_SECONDS,
+    '_mandatory_refresh_timeout': MANDATORY_REFRESH_SECONDS,
+}
+
+# boto3 Session objects are not thread-safe; serialize client creation
+_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def get_boto3_session() -> "boto3.Session":
+    """Process-wide boto3 session, so credentials/endpoints resolve once.
+    
+    Refreshable credentials get a narrower refresh window (see
+    ADVISORY_REFRESH_SECONDS) so they aren't re-fetched on every call. This
+    relies on botocore internals: if a botocore release renames them, the
+    default windows are kept.
+    """
+    import boto3
+    from botocore.credentials import RefreshableCredentials
+    
+    session = boto3.Session()
+    credentials = session.get_credentials()  # Cached by the session
+    if isinstance(credentials, RefreshableCredentials) and all(
+        hasattr(credentials, name) for name in _REFRESH_TIMEOUT_ATTRIBUTES
+    ):
+        for name, seconds in _REFRESH_TIMEOUT_ATTRIBUTES.items():
+            setattr(credentials, name, seconds)
+    return session
+
+
+def create_client(service_name: str, **kwargs):
+    """Create a client from the shared session.
+    
+    Args:
+        service_name: AWS service name (e.g. 's3')
+        **kwargs: Passed to boto3.Session.client (region_name, config, ...)
+    
+    Returns:
+        boto3 client
+    """
+    with _client_lock:
+        return get_boto3_session().client(service_name, **kwargs)
+
+
+@functools.lru_cache(maxsize=16)
+def get_client(service_name: str, region_name: Optional[str] = None):
+    """Cached default-config client, shared by every caller (clients are thread-safe).
+    
+    Args:
+        service_name: AWS service name (e.g. 's3')
+        region_name: AWS region (uses the session's default if None)
+    
+    Returns:
+        boto3 client
+    """
+    return create_client(service_name, region_name=region_name)
@@ -2,27 +2,239 @@
 """Browser session management with extension support."""
 
 import os
-from typing import Optional, List, Dict
-import boto3
-from botocore.exceptions import ClientError
+import re
+import time
+import queue
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, List, Dict
 from rich.console import Console
 
-console = Console()
+from aws_session import create_client, get_client
+
+# boto3/botocore are imported lazily: importing them costs ~150 ms, which
+# callers that never create a client shouldn't pay
+if TYPE_CHECKING:
+    import boto3
+    from botocore.config import Config
+
+# No auto-highlighting: status lines carry their own markup, and the
+# highlighter's regex pass costs CPU on every print
+console = Console(highlight=False)
+
+BROWSER_IDENTIFIER = 'aws.browser.v1'
+SESSION_TIMEOUT_SECONDS = 1800  # 30 minutes
+
+# Background warm-pool starts are rate limited to stay under the
+# StartBrowserSession TPS quota
+WARM_POOL_STARTS_PER_SECOND = 1.0
+
+# Pooled sessions older than this are stopped instead of handed out
+WARM_SESSION_MAX_AGE_SECONDS = SESSION_TIMEOUT_SECONDS - 300
+
+# Bedrock inference latency profiles ('optimized' is only offered for some
+# models and regions)
+BEDROCK_LATENCY_MODES = ('standard', 'optimized')
+
+# s3://bucket/key
+_S3_URI_RE = re.compile(r'^s3://([^/]+)/(.+)$')
+
+# Upper bound on concurrent StartBrowserSession/StopBrowserSession calls
+MAX_CONCURRENT_CALLS = 10
+
+# Connection pool size for the agentcore client (botocore default is 10)
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+# How long a resolved caller identity is reused by check_iam_permissions()
+IDENTITY_CACHE_SECONDS = 300
+
+def _agentcore_client_config() -> "Config":
+    """Build the botocore config for bedrock-agentcore clients.
+    
+    The pool is sized for concurrent start/stop calls so they reuse
+    keep-alive connections instead of paying a new TLS handshake each.
+    Override the size with AGENTCORE_MAX_POOL_CONNECTIONS.
+    """
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=int(os.environ.get(
+            'AGENTCORE_MAX_POOL_CONNECTIONS', DEFAULT_MAX_POOL_CONNECTIONS
+        )),
+        retries={'mode': 'adaptive', 'max_attempts': 5},
+        tcp_keepalive=True
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_agentcore_client(region: str):
+    """Cached bedrock-agentcore client for a region (clients are thread-safe)."""
+    return create_client(
+        'bedrock-agentcore',
+        region_name=region,
+        config=_agentcore_client_config()
+    )
+
+
+def _ttl_cache(seconds: float):
+    """Cache a function's results per arguments for `seconds`.
+    
+    Uses the monotonic clock; exceptions are not cached.
+    
+    Args:
+        seconds: How long a cached result stays valid
+    """
+    def decorator(func):
+        cache: Dict = {}
+        lock = threading.Lock()
+        
+        @functools.wraps(func)
+        def wrapper(*args):
+            with lock:
+                entry = cache.get(args)
+                if entry and time.monotonic() - entry[0] < seconds:
+                    return entry[1]
+            
+            value = func(*args)
+            with lock:
+                cache[args] = (time.monotonic(), value)
+            return value
+        
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+@_ttl_cache(seconds=IDENTITY_CACHE_SECONDS)
+def _get_caller_identity() -> Dict:
+    """STS GetCallerIdentity, cached so repeated checks skip the round trip."""
+    return get_client('sts').get_caller_identity()
+
+
+def build_extensions_config(extension_s3_uris: List[str]) -> List[Dict]:
+    """Convert extension S3 URIs into the StartBrowserSession extensions config.
+    
+    Args:
+        extension_s3_uris: List of S3 URIs for extensions (format: s3://bucket/key)
+        
+    Returns:
+        List of extension location dicts
+        
+    Raises:
+        ValueError: If a URI is not of the form s3://bucket/key
+    """
+    matches = [(uri, _S3_URI_RE.match(uri)) for uri in extension_s3_uris]
+    invalid = [uri for uri, match in matches if match is None]
+    if invalid:
+        raise ValueError(f"Invalid extension S3 URI(s), expected s3://bucket/key: {', '.join(invalid)}")
+    
+    # Use 'prefix' not 'key'
+    return [
+        {'location': {'s3': {'bucket': match.group(1), 'prefix': match.group(2)}}}
+        for _, match in matches
+    ]
+
+
+class _NullConsole:
+    """Console stand-in that discards output."""
+    
+    def print(self, *args, **kwargs):
+        pass
+
+
+class _TokenBucket:
+    """Thread-safe token bucket used to rate limit background API calls."""
+    
+    def __init__(self, rate: float, capacity: int):
+        """Initialize token bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """Block until a token is available.
+        
+        Args:
+            stop_event: Event that aborts the wait when set
+            
+        Returns:
+            True if a token was taken, False if stop_event was set first
+        """
+        while not stop_event.is_set():
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            stop_event.wait(wait)
+        return False
 
 
 class BrowserWithExtension:
     """Manage AgentCore Browser sessions with extensions."""
     
-    def __init__(self, region: Optional[str] = None):
+    def __init__(
+        self,
+        region: Optional[str] = None,
+        boto3_session: Optional["boto3.Session"] = None,
+        bedrock_latency: Optional[str] = None,
+        quiet: bool = False
+    ):
         """Initialize browser manager.
         
         Args:
             region: AWS region (uses AWS_REGION env var if None)
+            boto3_session: Session to create the client from (uses a shared,
+                cached client if None)
+            bedrock_latency: Latency profile for Bedrock calls made for the
+                extensions, 'standard' or 'optimized' (uses
+                BEDROCK_PERFORMANCE_LATENCY env var, then 'standard', if None)
+            quiet: Suppress status output (e.g. for batch or non-interactive use)
         """
+        self.console = _NullConsole() if quiet else console
         self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
-        self.agentcore_client = boto3.client('bedrock-agentcore', region_name=self.region)
-        self.browser_session = None
-        self.session_id = None
+        self.bedrock_latency = bedrock_latency or os.environ.get('BEDROCK_PERFORMANCE_LATENCY', 'standard')
+        if self.bedrock_latency not in BEDROCK_LATENCY_MODES:
+            raise ValueError(
+                f"Invalid bedrock_latency: {self.bedrock_latency} "
+                f"(expected one of {', '.join(BEDROCK_LATENCY_MODES)})"
+            )
+        if boto3_session is not None:
+            self.agentcore_client = boto3_session.client(
+                'bedrock-agentcore',
+                region_name=self.region,
+                config=_agentcore_client_config()
+            )
+        else:
+            self.agentcore_client = _get_agentcore_client(self.region)
+        self.sessions: List[Dict] = []  # Active sessions, oldest first
+        
+        # Warm pool of pre-started sessions (see warm_pool())
+        self._warm_sessions: "queue.Queue[Dict]" = queue.Queue()
+        self._warm_pool_uris: Optional[List[str]] = None
+        self._warm_pool_stop = threading.Event()
+        self._warm_pool_thread: Optional[threading.Thread] = None
+    
+    @property
+    def browser_session(self) -> Optional[Dict]:
+        """Most recently created active session, if any."""
+        return self.sessions[-1] if self.sessions else None
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        """Session ID of the most recently created active session, if any."""
+        session = self.browser_session
+        return session['session_id'] if session else None
         
     def create_browser_session(
         self,
@@ -38,79 +250,293 @@ class BrowserWithExtension:
         Returns:
             Browser session details
         """
-        console.print("\n[bold cyan]🌐 Creating Browser Session with Extensions[/bold cyan]\n")
-        
-        # Parse S3 URIs and prepare extensions configuration
-        extensions = []
-        for uri in extension_s3_uris:
-            # Parse s3://bucket/key format
-            if uri.startswith('s3://'):
-                parts = uri[5:].split('/', 1)
-                bucket = parts[0]
-                prefix = parts[1] if len(parts) > 1 else ''
-                
-                extensions.append({
-                    'location': {
-                        's3': {
-                            'bucket': bucket,
-                            'prefix': prefix  # Use 'prefix' not 'key'
-                        }
-                    }
+        if session_name is None:
+            session = self._take_warm_session(extension_s3_uris)
+            if session:
+                self.sessions.append({
+                    'session_id': session['session_id'],
+                    'session_name': session['session_name'],
+                    'region': self.region
                 })
+                self.console.print(f"[green]✓[/green] Using pre-started browser session: {session['session_name']}")
+                self.console.print(f"[dim]Session ID: {session['session_id']}[/dim]")
+                return {
+                    'session_id': session['session_id'],
+                    'region': self.region,
+                    'extensions': extension_s3_uris,
+                    'status': 'active'
+                }
         
-        console.print(f"[cyan]Extensions to load:[/cyan]")
-        for i, uri in enumerate(extension_s3_uris, 1):
-            console.print(f"  {i}. {uri}")
+        return self.create_browser_sessions([{
+            'extension_s3_uris': extension_s3_uris,
+            'session_name': session_name
+        }])[0]
+    
+    def create_browser_sessions(self, configs: List[Dict]) -> List[Dict]:
+        """Create several browser sessions concurrently.
         
-        console.print(f"\n[cyan]Region: {self.region}[/cyan]")
-        if not session_name:
-            import time
-            session_name = f"extension-demo-{int(time.time())}"
-        console.print(f"[cyan]Session Name: {session_name}[/cyan]")
+        StartBrowserSession calls are fanned out over a thread pool sharing
+        the same (thread-safe) AgentCore client, so N sessions start in
+        roughly the time of the slowest one.
         
-        try:
-            console.print("\n[dim]Starting browser session with extensions...[/dim]")
-            
-            # Use start_browser_session API
-            response = self.agentcore_client.start_browser_session(
-                browserIdentifier='aws.browser.v1',
-                name=session_name,
-                sessionTimeoutSeconds=1800,  # 30 minutes
-                extensions=extensions
-            )
+        Args:
+            configs: One dict per session with 'extension_s3_uris' and an
+                optional 'session_name' (auto-generated if missing)
+            
+        Returns:
+            Browser session details, in the same order as configs
+        """
+        if not configs:
+            return []
+        
+        plural = "s" if len(configs) > 1 else ""
+        self.console.print(f"\n[bold cyan]🌐 Creating Browser Session{plural} with Extensions[/bold cyan]\n")
+        
+        timestamp = int(time.time())
+        requests = []
+        for index, config in enumerate(configs, 1):
+            extension_s3_uris = config['extension_s3_uris']
+            session_name = config.get('session_name')
+            if not session_name:
+                session_name = f"extension-demo-{timestamp}"
+                if len(configs) > 1:
+                    session_name += f"-{index}"
+            
+            # Parse S3 URIs and prepare extensions configuration
+            extensions = build_extensions_config(extension_s3_uris)
             
-            self.session_id = response['sessionId']
+            self.console.print(f"[cyan]Session Name: {session_name}[/cyan]")
+            self.console.print(f"[cyan]Extensions to load:[/cyan]")
+            for i, uri in enumerate(extension_s3_uris, 1):
+                self.console.print(f"  {i}. {uri}")
+            
+            requests.append((session_name, extension_s3_uris, extensions))
+        
+        self.console.print(f"\n[cyan]Region: {self.region}[/cyan]")
+        self.console.print(f"\n[dim]Starting browser session{plural} with extensions...[/dim]")
+        
+        results: List[Optional[Dict]] = [None] * len(requests)
+        errors = []
+        
+        with ThreadPoolExecutor(max_workers=min(len(requests), MAX_CONCURRENT_CALLS)) as executor:
+            futures = [
+                executor.submit(self._start_session, session_name, extensions)
+                for session_name, _, extensions in requests
+            ]
+        
+        # Collected in request order, not completion order, so self.sessions
+        # (and with it session_id/browser_session) doesn't depend on which
+        # start happened to finish first
+        for index, ((session_name, extension_s3_uris, _), future) in enumerate(zip(requests, futures)):
+            try:
+                session_id = future.result()
+            except Exception as e:
+                self.console.print(f"[red]✗[/red] Failed to create browser session {session_name}: {e}")
+                errors.append(e)
+                continue
             
             # Store session info
-            self.browser_session = {
-                'session_id': self.session_id,
+            self.sessions.append({
+                'session_id': session_id,
                 'session_name': session_name,
                 'region': self.region
-            }
+            })
             
-            console.print(f"[green]✓[/green] Browser session created successfully")
-            console.print(f"[dim]Session ID: {self.session_id}[/dim]")
-            console.print(f"[dim]Console: https://console.aws.amazon.com/agentcore/home?region={self.region}#/browsers[/dim]")
+            self.console.print(f"[green]✓[/green] Browser session created successfully: {session_name}")
+            self.console.print(f"[dim]Session ID: {session_id}[/dim]")
             
-            # Get session details
-            session_details = {
-                'session_id': self.session_id,
+            results[index] = {
+                'session_id': session_id,
                 'region': self.region,
                 'extensions': extension_s3_uris,
                 'status': 'active'
             }
+        
+        if errors:
+            self.console.print("\n[yellow]Troubleshooting tips:[/yellow]")
+            self.console.print("  1. Check AWS credentials and permissions")
+            self.console.print("  2. Verify S3 URIs are accessible")
+            self.console.print("  3. Ensure IAM policy includes s3:GetObject permission")
+            self.console.print("  4. Check that region supports AgentCore Browser")
+            # Sessions that did start stay tracked so close_session() stops them
+            raise errors[0]
+        
+        self.console.print(f"[dim]Console: https://console.aws.amazon.com/agentcore/home?region={self.region}#/browsers[/dim]")
+        self.console.print(f"\n[green]✓ Browser session{plural} ready![/green]\n")
+        return results
+    
+    def _start_session(self, session_name: str, extensions: List[Dict]) -> str:
+        """Start a single browser session.
+        
+        clientToken is left to botocore: it is an idempotency-token member,
+        so botocore generates one per call and resends it on every retry.
+        
+        Args:
+            session_name: Session name
+            extensions: Extensions config from build_extensions_config()
+            
+        Returns:
+            New session ID
+        """
+        response = self.agentcore_client.start_browser_session(
+            browserIdentifier=BROWSER_IDENTIFIER,
+            name=session_name,
+            sessionTimeoutSeconds=SESSION_TIMEOUT_SECONDS,
+            extensions=extensions
+        )
+        return response['sessionId']
+    
+    def warm_pool(
+        self,
+        extension_s3_uris: List[str],
+        size: int = 2,
+        starts_per_second: float = WARM_POOL_STARTS_PER_SECOND
+    ):
+        """Keep pre-started browser sessions ready to hide cold-start latency.
+        
+        A daemon thread tops the pool up to `size` sessions loaded with the
+        given extensions. create_browser_session() hands out a pooled session
+        when called with the same extensions and no explicit session name,
+        and only falls back to starting one on a miss.
+        
+        Args:
+            extension_s3_uris: List of S3 URIs for extensions
+            size: Number of sessions to keep ready
+            starts_per_second: Rate limit for background session starts
+        """
+        self.stop_warm_pool()
+        
+        # Validate URIs up front rather than in the background thread
+        extensions = build_extensions_config(extension_s3_uris)
+        
+        self._warm_pool_uris = sorted(extension_s3_uris)
+        self._warm_pool_stop = threading.Event()
+        self._warm_pool_thread = threading.Thread(
+            target=self._fill_warm_pool,
+            args=(
+                extension_s3_uris,
+                extensions,
+                size,
+                _TokenBucket(starts_per_second, size),
+                self._warm_pool_stop
+            ),
+            name='browser-warm-pool',
+            daemon=True
+        )
+        self._warm_pool_thread.start()
+        self.console.print(f"[dim]Warming {size} browser session(s) in the background...[/dim]")
+    
+    def stop_warm_pool(self):
+        """Stop refilling the warm pool and stop any unused pooled sessions."""
+        if self._warm_pool_thread is None:
+            return
+        
+        self._warm_pool_stop.set()
+        self._warm_pool_thread.join(timeout=30)
+        self._warm_pool_thread = None
+        self._warm_pool_uris = None
+        
+        unused = []
+        while True:
+            try:
+                unused.append(self._warm_sessions.get_nowait()['session_id'])
+            except queue.Empty:
+                break
+        self._stop_sessions(unused)
+    
+    def _fill_warm_pool(
+        self,
+        extension_s3_uris: List[str],
+        extensions: List[Dict],
+        size: int,
+        bucket: _TokenBucket,
+        stop_event: threading.Event
+    ):
+        """Warm pool worker: keep `size` ready sessions in the queue."""
+        started = 0
+        while not stop_event.is_set():
+            if self._warm_sessions.qsize() >= size:
+                stop_event.wait(0.5)
+                continue
             
-            console.print("\n[green]✓ Browser session ready![/green]\n")
-            return session_details
+            if not bucket.acquire(stop_event):
+                break
             
-        except Exception as e:
-            console.print(f"[red]✗[/red] Failed to create browser session: {e}")
-            console.print("\n[yellow]Troubleshooting tips:[/yellow]")
-            console.print("  1. Check AWS credentials and permissions")
-            console.print("  2. Verify S3 URIs are accessible")
-            console.print("  3. Ensure IAM policy includes s3:GetObject permission")
-            console.print("  4. Check that region supports AgentCore Browser")
-            raise
+            started += 1
+            session_name = f"extension-demo-{int(time.time())}-warm{started}"
+            try:
+                session_id = self._start_session(
+                    session_name,
+                    extensions
+                )
+            except Exception as e:
+                self.console.print(f"[yellow]⚠[/yellow] Warm pool failed to start session: {e}")
+                stop_event.wait(5)
+                continue
+            
+            if stop_event.is_set():
+                # Pool was stopped while this session was starting
+                self._stop_session_quietly(session_id)
+                break
+            
+            self._warm_sessions.put({
+                'session_id': session_id,
+                'session_name': session_name,
+                'started_at': time.monotonic()
+            })
+    
+    def _take_warm_session(self, extension_s3_uris: List[str]) -> Optional[Dict]:
+        """Pop a ready pooled session for these extensions, if any."""
+        if self._warm_pool_uris != sorted(extension_s3_uris):
+            return None
+        
+        while True:
+            try:
+                session = self._warm_sessions.get_nowait()
+            except queue.Empty:
+                return None
+            
+            if time.monotonic() - session['started_at'] < WARM_SESSION_MAX_AGE_SECONDS:
+                return session
+            
+            # Too close to its timeout to be useful
+            self._stop_session_quietly(session['session_id'])
+    
+    def _stop_sessions(self, session_ids: List[str]) -> List[Optional[Exception]]:
+        """Stop several sessions in parallel.
+        
+        Args:
+            session_ids: Session IDs to stop
+            
+        Returns:
+            Per-session error (None on success), in the same order as session_ids
+        """
+        if not session_ids:
+            return []
+        
+        def stop(session_id: str) -> Optional[Exception]:
+            try:
+                self.agentcore_client.stop_browser_session(
+                    browserIdentifier=BROWSER_IDENTIFIER,
+                    sessionId=session_id
+                )
+                return None
+            except Exception as e:
+                # Returned rather than raised so one failure doesn't block the rest
+                return e
+        
+        with ThreadPoolExecutor(max_workers=min(len(session_ids), MAX_CONCURRENT_CALLS)) as executor:
+            return list(executor.map(stop, session_ids))
+    
+    def _stop_session_quietly(self, session_id: str):
+        """Stop a session that was never handed out, ignoring errors."""
+        try:
+            self.agentcore_client.stop_browser_session(
+                browserIdentifier=BROWSER_IDENTIFIER,
+                sessionId=session_id
+            )
+        except Exception:
+            pass
     
     def verify_extension_loaded(self) -> bool:
         """Verify that extensions are loaded in the browser.
@@ -118,16 +544,16 @@ class BrowserWithExtension:
         Returns:
             True if extensions appear to be loaded
         """
-        console.print("[cyan]Verifying extension installation...[/cyan]")
+        self.console.print("[cyan]Verifying extension installation...[/cyan]")
         
         if not self.browser_session:
-            console.print("[red]✗[/red] No active browser session")
+            self.console.print("[red]✗[/red] No active browser session")
             return False
         
         try:
             # Try to navigate to chrome://extensions to verify
             # Note: This may not work as chrome:// URLs are restricted
-            console.print("[dim]Checking browser state...[/dim]")
+            self.console.print("[dim]Checking browser state...[/dim]")
             
             # For now, we'll assume success if session was created
             # In a real implementation, you'd need to:
@@ -135,14 +561,14 @@ class BrowserWithExtension:
             # 2. Check if extension UI elements are present
             # 3. Or use extension-specific verification methods
             
-            console.print("[green]✓[/green] Browser session is active")
-            console.print("[yellow]⚠[/yellow] Extension verification requires manual check")
-            console.print("[dim]Navigate to chrome://extensions in the browser to verify[/dim]")
+            self.console.print("[green]✓[/green] Browser session is active")
+            self.console.print("[yellow]⚠[/yellow] Extension verification requires manual check")
+            self.console.print("[dim]Navigate to chrome://extensions in the browser to verify[/dim]")
             
             return True
             
         except Exception as e:
-            console.print(f"[yellow]⚠[/yellow] Could not verify extension: {e}")
+            self.console.print(f"[yellow]⚠[/yellow] Could not verify extension: {e}")
             return False
     
     def test_extension_functionality(self, test_url: str = "https://aws.amazon.com") -> bool:
@@ -154,32 +580,57 @@ class BrowserWithExtension:
         Returns:
             True if test succeeded
         """
-        console.print(f"\n[cyan]Testing extension functionality...[/cyan]")
-        console.print(f"[dim]Test URL: {test_url}[/dim]")
+        self.console.print(f"\n[cyan]Testing extension functionality...[/cyan]")
+        self.console.print(f"[dim]Test URL: {test_url}[/dim]")
         
         if not self.browser_session:
-            console.print("[red]✗[/red] No active browser session")
+            self.console.print("[red]✗[/red] No active browser session")
             return False
         
         try:
             # Navigate to test page
-            console.print(f"[dim]Navigating to {test_url}...[/dim]")
+            self.console.print(f"[dim]Navigating to {test_url}...[/dim]")
             
             # Note: Actual navigation would require using the browser client
             # This is a placeholder for the actual implementation
             
-            console.print("[green]✓[/green] Navigation successful")
-            console.print("\n[yellow]Manual verification required:[/yellow]")
-            console.print("  1. Check if extension icon appears in browser toolbar")
-            console.print("  2. Click extension icon to verify it's functional")
-            console.print("  3. Try using extension features (e.g., summarize page)")
+            self.console.print("[green]✓[/green] Navigation successful")
+            self.console.print("\n[yellow]Manual verification required:[/yellow]")
+            self.console.print("  1. Check if extension icon appears in browser toolbar")
+            self.console.print("  2. Click extension icon to verify it's functional")
+            self.console.print("  3. Try using extension features (e.g., summarize page)")
             
             return True
             
         except Exception as e:
-            console.print(f"[red]✗[/red] Test failed: {e}")
+            self.console.print(f"[red]✗[/red] Test failed: {e}")
             return False
     
+    def bedrock_performance_config(self, operation: str = 'converse') -> Dict:
+        """Get performance kwargs for bedrock-runtime calls made for the extensions.
+        
+        Splat the result into the call, e.g.
+        ``runtime.converse(modelId=..., messages=..., **browser.bedrock_performance_config())``.
+        Nothing is added in 'standard' mode, so models and regions without
+        latency-optimized inference are unaffected.
+        
+        Args:
+            operation: bedrock-runtime operation the kwargs are for
+                ('converse', 'converse_stream', 'invoke_model' or
+                'invoke_model_with_response_stream')
+            
+        Returns:
+            Keyword arguments for the bedrock-runtime call
+        """
+        if self.bedrock_latency == 'standard':
+            return {}
+        
+        if operation in ('converse', 'converse_stream'):
+            return {'performanceConfig': {'latency': self.bedrock_latency}}
+        if operation in ('invoke_model', 'invoke_model_with_response_stream'):
+            return {'performanceConfigLatency': self.bedrock_latency}
+        raise ValueError(f"Unsupported bedrock-runtime operation: {operation}")
+    
     def get_session_info(self) -> Optional[Dict]:
         """Get current session information.
         
@@ -196,22 +647,25 @@ class BrowserWithExtension:
         }
     
     def close_session(self):
-        """Close the browser session."""
-        console.print("\n[cyan]Closing browser session...[/cyan]")
+        """Close all browser sessions created by this manager, in parallel."""
+        self.console.print("\n[cyan]Closing browser session...[/cyan]")
         
-        if self.browser_session and self.session_id:
-            try:
-                # Stop the browser session
-                self.agentcore_client.stop_browser_session(
-                    sessionId=self.session_id
-                )
-                console.print("[green]✓[/green] Browser session stopped")
-                self.browser_session = None
-                self.session_id = None
-            except Exception as e:
-                console.print(f"[yellow]⚠[/yellow] Error stopping session: {e}")
-        else:
-            console.print("[dim]No active session to close[/dim]")
+        self.stop_warm_pool()
+        
+        if not self.sessions:
+            self.console.print("[dim]No active session to close[/dim]")
+            return
+        
+        # Stop all browser sessions in parallel
+        sessions = list(self.sessions)
+        errors = self._stop_sessions([session['session_id'] for session in sessions])
+        
+        for session, error in zip(sessions, errors):
+            if error is None:
+                self.console.print(f"[green]✓[/green] Browser session stopped: {session['session_id']}")
+                self.sessions.remove(session)
+            else:
+                self.console.print(f"[yellow]⚠[/yellow] Error stopping session {session['session_id']}: {error}")
     
     def __enter__(self):
         """Context manager entry."""
@@ -222,9 +676,13 @@ class BrowserWithExtension:
         self.close_session()
 
 
-def check_iam_permissions() -> bool:
+def check_iam_permissions(identity: Optional[Dict] = None) -> bool:
     """Check if required IAM permissions are available.
     
+    Args:
+        identity: Already-resolved GetCallerIdentity response (skips the
+            STS call); otherwise a cached identity up to 5 minutes old is used
+    
     Returns:
         True if permissions appear to be available
     """
@@ -232,8 +690,8 @@ def check_iam_permissions() -> bool:
     
     try:
         # Check AWS identity
-        sts = boto3.client('sts')
-        identity = sts.get_caller_identity()
+        if identity is None:
+            identity = _get_caller_identity()
         
         console.print(f"[green]✓[/green] AWS Account: {identity['Account']}")
         console.print(f"[green]✓[/green] Identity: {identity['Arn'].split('/')[-1]}")
@@ -4,62 +4,55 @@
 This extension modifies browser properties to make it appear more like a regular user browser.
 """
 
+import io
 import json
+import hashlib
 import zipfile
 from pathlib import Path
+from typing import Optional
 from rich.console import Console
 
-console = Console()
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
 
+console = Console()
 
-def create_stealth_extension(output_dir: Path = Path("stealth_extension")):
-    """Create a stealth extension to bypass bot detection.
-    
-    Args:
-        output_dir: Directory to create extension in
-    """
-    console.print("[cyan]Creating stealth extension...[/cyan]")
-    
-    # Create directory
-    output_dir.mkdir(exist_ok=True)
-    
-    # Create manifest.json
-    manifest = {
-        "manifest_version": 3,
-        "name": "Stealth Mode for AgentCore Browser",
-        "version": "1.0.0",
-        "description": "Makes the browser appear more human-like to bypass bot detection",
-        "permissions": ["webNavigation", "webRequest", "storage"],
-        "host_permissions": ["<all_urls>"],
-        "background": {
-            "service_worker": "background.js"
-        },
-        "content_scripts": [
-            {
-                "matches": ["<all_urls>"],
-                "js": ["content.js"],
-                "run_at": "document_start",
-                "all_frames": True
-            }
-        ],
-        "web_accessible_resources": [
-            {
-                "resources": ["inject.js"],
-                "matches": ["<all_urls>"]
-            }
-        ],
-        "icons": {
-            "16": "icon16.png",
-            "48": "icon48.png",
-            "128": "icon128.png"
+# Extension assets. None of them depend on runtime input.
+MANIFEST = {
+    "manifest_version": 3,
+    "name": "Stealth Mode for AgentCore Browser",
+    "version": "1.0.0",
+    "description": "Makes the browser appear more human-like to bypass bot detection",
+    "permissions": ["webNavigation", "webRequest", "storage"],
+    "host_permissions": ["<all_urls>"],
+    "background": {
+        "service_worker": "background.js"
+    },
+    "content_scripts": [
+        {
+            "matches": ["<all_urls>"],
+            "js": ["content.js"],
+            "run_at": "document_start",
+            "all_frames": True
+        }
+    ],
+    "web_accessible_resources": [
+        {
+            "resources": ["inject.js"],
+            "matches": ["<all_urls>"]
         }
+    ],
+    "icons": {
+        "16": "icon16.png",
+        "48": "icon48.png",
+        "128": "icon128.png"
     }
-    
-    with open(output_dir / "manifest.json", "w") as f:
-        json.dump(manifest, f, indent=2)
-    
-    # Create background.js
-    background_js = """// Background script for stealth mode
+}
+
+BACKGROUND_JS = """// Background script for stealth mode
 
 // Override User-Agent for all requests
 chrome.webRequest.onBeforeSendHeaders.addListener(
@@ -111,14 +104,50 @@ chrome.webRequest.onBeforeRequest.addListener(
   { urls: ['<all_urls>'] }
 );
 
+// Bulk DOM actions: forward {action: 'bulk', ops: [{type, selector, value}]}
+// to the content script of the target tab (message.tabId, the sender's tab,
+// or the active tab) and reply with its single aggregated result
+chrome.runtime.onMessage.addListener(function(message, sender, sendResponse) {
+  if (!message || message.action !== 'bulk') {
+    return false;
+  }
+  
+  const forward = function(tabId) {
+    chrome.tabs.sendMessage(
+      tabId,
+      { action: 'bulk', ops: message.ops || [] },
+      { frameId: 0 },
+      function(result) {
+        if (chrome.runtime.lastError) {
+          sendResponse({ ok: false, error: chrome.runtime.lastError.message });
+        } else {
+          sendResponse(result);
+        }
+      }
+    );
+  };
+  
+  const tabId = message.tabId || (sender.tab && sender.tab.id);
+  if (tabId) {
+    forward(tabId);
+  } else {
+    chrome.tabs.query({ active: true, currentWindow: true }, function(tabs) {
+      if (tabs.length) {
+        forward(tabs[0].id);
+      } else {
+        sendResponse({ ok: false, error: 'No target tab for bulk actions' });
+      }
+    });
+  }
+  
+  // Keep sendResponse alive for the asynchronous reply
+  return true;
+});
+
 console.log('Stealth mode background script loaded');
 """
-    
-    with open(output_dir / "background.js", "w") as f:
-        f.write(background_js)
-    
-    # Create content.js
-    content_js = """// Content script to inject stealth code
+
+CONTENT_JS = """// Content script to inject stealth code
 
 (function() {
   'use strict';
@@ -130,14 +159,67 @@ console.log('Stealth mode background script loaded');
     this.remove();
   };
   (document.head || document.documentElement).appendChild(script);
+  
+  // Set a form value through the native setter so framework-controlled
+  // inputs (React, Vue) see the change
+  function setValue(element, value) {
+    const descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(element), 'value');
+    if (descriptor && descriptor.set) {
+      descriptor.set.call(element, value);
+    } else {
+      element.value = value;
+    }
+  }
+  
+  function runOp(op, index) {
+    try {
+      const element = document.querySelector(op.selector);
+      if (!element) {
+        return { index: index, ok: false, error: 'No element matches ' + op.selector };
+      }
+      
+      switch (op.type) {
+        case 'click':
+          element.click();
+          break;
+        case 'type':
+          element.focus();
+          setValue(element, op.value == null ? '' : String(op.value));
+          element.dispatchEvent(new Event('input', { bubbles: true }));
+          element.dispatchEvent(new Event('change', { bubbles: true }));
+          break;
+        case 'select':
+          setValue(element, String(op.value));
+          element.dispatchEvent(new Event('change', { bubbles: true }));
+          break;
+        case 'check':
+          element.checked = op.value !== false;
+          element.dispatchEvent(new Event('change', { bubbles: true }));
+          break;
+        default:
+          return { index: index, ok: false, error: 'Unknown op type: ' + op.type };
+      }
+      return { index: index, ok: true };
+    } catch (e) {
+      return { index: index, ok: false, error: String(e) };
+    }
+  }
+  
+  // Bulk DOM actions: run every op in one task and reply once
+  chrome.runtime.onMessage.addListener(function(message, sender, sendResponse) {
+    if (!message || message.action !== 'bulk') {
+      return false;
+    }
+    
+    const results = (message.ops || []).map(runOp);
+    sendResponse({ ok: results.every(function(r) { return r.ok; }), results: results });
+    return false;
+  });
 })();
 """
-    
-    with open(output_dir / "content.js", "w") as f:
-        f.write(content_js)
-    
-    # Create inject.js - the main stealth code
-    inject_js = """// Stealth mode injection script
+
+# The main stealth code, injected into the page context
+INJECT_JS = """// Stealth mode injection script
 // This runs in the page context to modify browser properties
 
 (function() {
@@ -145,65 +227,61 @@ console.log('Stealth mode background script loaded');
   
   console.log('Stealth mode activated');
   
-  // Override navigator.webdriver (most important)
-  Object.defineProperty(navigator, 'webdriver', {
-    get: () => undefined,
-    configurable: true
-  });
-  
-  // Override navigator properties to appear more human
-  const navigatorProps = {
-    platform: 'MacIntel',
-    vendor: 'Google Inc.',
-    hardwareConcurrency: 8,
-    deviceMemory: 8,
-    maxTouchPoints: 0
+  // Override navigator properties to appear more human. A single
+  // defineProperties call avoids one prototype transition per property.
+  const navigatorDescriptors = {
+    // Override navigator.webdriver (most important)
+    webdriver: { get: () => undefined, configurable: true },
+    platform: { get: () => 'MacIntel', configurable: true },
+    vendor: { get: () => 'Google Inc.', configurable: true },
+    hardwareConcurrency: { get: () => 8, configurable: true },
+    deviceMemory: { get: () => 8, configurable: true },
+    maxTouchPoints: { get: () => 0, configurable: true },
+    
+    // Override plugins to appear more realistic
+    plugins: {
+      get: () => {
+        return [
+          {
+            name: 'Chrome PDF Plugin',
+            description: 'Portable Document Format',
+            filename: 'internal-pdf-viewer',
+            length: 1
+          },
+          {
+            name: 'Chrome PDF Viewer',
+            description: '',
+            filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai',
+            length: 1
+          },
+          {
+            name: 'Native Client',
+            description: '',
+            filename: 'internal-nacl-plugin',
+            length: 2
+          }
+        ];
+      },
+      configurable: true
+    },
+    
+    // Override languages
+    languages: { get: () => ['en-US', 'en'], configurable: true }
   };
   
-  for (const [key, value] of Object.entries(navigatorProps)) {
-    try {
-      Object.defineProperty(navigator, key, {
-        get: () => value,
-        configurable: true
-      });
-    } catch (e) {
-      console.warn(`Failed to override navigator.${key}:`, e);
+  try {
+    Object.defineProperties(navigator, navigatorDescriptors);
+  } catch (e) {
+    // Fall back to per-property overrides so one failure doesn't block the rest
+    for (const [key, descriptor] of Object.entries(navigatorDescriptors)) {
+      try {
+        Object.defineProperty(navigator, key, descriptor);
+      } catch (err) {
+        console.warn(`Failed to override navigator.${key}:`, err);
+      }
     }
   }
   
-  // Override plugins to appear more realistic
-  Object.defineProperty(navigator, 'plugins', {
-    get: () => {
-      return [
-        {
-          name: 'Chrome PDF Plugin',
-          description: 'Portable Document Format',
-          filename: 'internal-pdf-viewer',
-          length: 1
-        },
-        {
-          name: 'Chrome PDF Viewer',
-          description: '',
-          filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai',
-          length: 1
-        },
-        {
-          name: 'Native Client',
-          description: '',
-          filename: 'internal-nacl-plugin',
-          length: 2
-        }
-      ];
-    },
-    configurable: true
-  });
-  
-  // Override languages
-  Object.defineProperty(navigator, 'languages', {
-    get: () => ['en-US', 'en'],
-    configurable: true
-  });
-  
   // Override permissions
   const originalQuery = window.navigator.permissions.query;
   window.navigator.permissions.query = (parameters) => (
@@ -225,14 +303,9 @@ console.log('Stealth mode background script loaded');
   }
   
   // Add realistic screen properties
-  Object.defineProperty(screen, 'availWidth', {
-    get: () => 1920,
-    configurable: true
-  });
-  
-  Object.defineProperty(screen, 'availHeight', {
-    get: () => 1080,
-    configurable: true
+  Object.defineProperties(screen, {
+    availWidth: { get: () => 1920, configurable: true },
+    availHeight: { get: () => 1080, configurable: true }
   });
   
   // Override automation-related properties
@@ -269,13 +342,15 @@ console.log('Stealth mode background script loaded');
   // Prevent canvas fingerprinting
   const originalToDataURL = HTMLCanvasElement.prototype.toDataURL;
   HTMLCanvasElement.prototype.toDataURL = function(type) {
-    // Add slight noise to canvas to prevent fingerprinting
+    // Add slight noise to canvas to prevent fingerprinting. Flipping the
+    // low bit of a few random pixels changes the hash without walking
+    // every pixel of large canvases.
     const context = this.getContext('2d');
-    if (context) {
+    if (context && this.width && this.height) {
       const imageData = context.getImageData(0, 0, this.width, this.height);
-      for (let i = 0; i < imageData.data.length; i += 4) {
-        // Add tiny random noise
-        imageData.data[i] += Math.floor(Math.random() * 2);
+      const pixels = new Uint32Array(imageData.data.buffer);
+      for (let j = 0; j < 8; j++) {
+        pixels[(Math.random() * pixels.length) | 0] ^= 1;
       }
       context.putImageData(imageData, 0, 0);
     }
@@ -308,32 +383,158 @@ console.log('Stealth mode background script loaded');
   console.log('Stealth mode: All overrides applied successfully');
 })();
 """
+
+# Simple icon (1x1 PNG), shared by all icon sizes
+ICON_PNG = bytes([
+    0x89, 0x50, 0x4E, 0x47, 0x0D, 0x0A, 0x1A, 0x0A,
+    0x00, 0x00, 0x00, 0x0D, 0x49, 0x48, 0x44, 0x52,
+    0x00, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0x01,
+    0x08, 0x02, 0x00, 0x00, 0x00, 0x90, 0x77, 0x53,
+    0xDE, 0x00, 0x00, 0x00, 0x0C, 0x49, 0x44, 0x41,
+    0x54, 0x08, 0xD7, 0x63, 0xF8, 0xFF, 0xFF, 0x3F,
+    0x00, 0x05, 0xFE, 0x02, 0xFE, 0xDC, 0xCC, 0x59,
+    0xE7, 0x00, 0x00, 0x00, 0x00, 0x49, 0x45, 0x4E,
+    0x44, 0xAE, 0x42, 0x60, 0x82
+])
+
+
+def _manifest_bytes(pretty: bool = False) -> bytes:
+    """Serialize MANIFEST, compact unless a human-readable copy is wanted.
+    
+    Args:
+        pretty: Indent the JSON for debugging
+    
+    Returns:
+        UTF-8 encoded manifest
+    """
+    if pretty:
+        return json.dumps(MANIFEST, indent=2).encode()
+    if HAVE_ORJSON:
+        return orjson.dumps(MANIFEST)
+    return json.dumps(MANIFEST, separators=(',', ':')).encode()
+
+
+# Extension files serialized once at import: archive name -> contents.
+# Chrome doesn't need an indented manifest, so it is written compact.
+EXTENSION_FILES = {
+    "manifest.json": _manifest_bytes(),
+    "background.js": BACKGROUND_JS.encode(),
+    "content.js": CONTENT_JS.encode(),
+    "inject.js": INJECT_JS.encode(),
+    **{f"icon{size}.png": ICON_PNG for size in (16, 48, 128)},
+}
+
+# The payload is a few KB of text: fast deflate costs almost nothing in size
+ZIP_COMPRESSLEVEL = 1
+
+# Already-compressed formats are stored as-is
+STORED_SUFFIXES = {'.png'}
+
+
+def _assets_digest() -> bytes:
+    """SHA-256 over the packaging settings and every asset name and body."""
+    digest = hashlib.sha256(f"deflate-{ZIP_COMPRESSLEVEL}".encode())
+    for name, data in EXTENSION_FILES.items():
+        digest.update(name.encode() + b"\0")
+        digest.update(data)
+    return digest.digest()
+
+
+# Stored in the zip comment so an up-to-date zip can be detected without
+# rebuilding it
+EXTENSION_DIGEST = _assets_digest()
+
+
+def _compress_type(name) -> int:
+    """Pick the zip compression method for an archive member."""
+    if Path(name).suffix.lower() in STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _write_assets(zipf: zipfile.ZipFile):
+    """Write the in-memory stealth extension files into an open zip."""
+    for name, data in EXTENSION_FILES.items():
+        zipf.writestr(name, data, compress_type=_compress_type(name))
+
+
+def _write_directory(zipf: zipfile.ZipFile, extension_dir: Path):
+    """Write every file under extension_dir into an open zip."""
+    for file_path in extension_dir.rglob('*'):
+        if file_path.is_file():
+            arcname = file_path.relative_to(extension_dir)
+            zipf.write(file_path, arcname, compress_type=_compress_type(file_path))
+
+
+def create_stealth_extension(output_dir: Path = Path("stealth_extension"), pretty: bool = False):
+    """Create a stealth extension to bypass bot detection.
     
-    with open(output_dir / "inject.js", "w") as f:
-        f.write(inject_js)
-    
-    # Create simple icon files (1x1 PNG)
-    png_data = bytes([
-        0x89, 0x50, 0x4E, 0x47, 0x0D, 0x0A, 0x1A, 0x0A,
-        0x00, 0x00, 0x00, 0x0D, 0x49, 0x48, 0x44, 0x52,
-        0x00, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0x01,
-        0x08, 0x02, 0x00, 0x00, 0x00, 0x90, 0x77, 0x53,
-        0xDE, 0x00, 0x00, 0x00, 0x0C, 0x49, 0x44, 0x41,
-        0x54, 0x08, 0xD7, 0x63, 0xF8, 0xFF, 0xFF, 0x3F,
-        0x00, 0x05, 0xFE, 0x02, 0xFE, 0xDC, 0xCC, 0x59,
-        0xE7, 0x00, 0x00, 0x00, 0x00, 0x49, 0x45, 0x4E,
-        0x44, 0xAE, 0x42, 0x60, 0x82
-    ])
-    
-    for size in [16, 48, 128]:
-        with open(output_dir / f"icon{size}.png", "wb") as f:
-            f.write(png_data)
+    Files that already exist with the expected contents are not rewritten.
+    
+    Args:
+        output_dir: Directory to create extension in
+        pretty: Write an indented manifest.json for debugging
+    """
+    console.print("[cyan]Creating stealth extension...[/cyan]")
+    
+    # Create directory
+    output_dir.mkdir(exist_ok=True)
+    
+    files = dict(EXTENSION_FILES)
+    if pretty:
+        files["manifest.json"] = _manifest_bytes(pretty=True)
+    
+    updated = 0
+    for name, data in files.items():
+        file_path = output_dir / name
+        if (
+            file_path.is_file()
+            and file_path.stat().st_size == len(data)
+            and file_path.read_bytes() == data
+        ):
+            continue
+        file_path.write_bytes(data)
+        updated += 1
     
     console.print(f"[green]✓[/green] Stealth extension created in: {output_dir}")
+    console.print(f"[dim]{updated} of {len(EXTENSION_FILES)} files updated[/dim]")
     
     return output_dir
 
 
+def build_extension_zip(output_zip: Path = Path("stealth-extension.zip"), force: bool = False):
+    """Package the stealth extension straight from memory into a zip file.
+    
+    Unlike package_extension(), no extension directory is needed. An existing
+    zip whose comment holds the current asset digest is reused as-is.
+    
+    Args:
+        output_zip: Output zip file path
+        force: Rebuild even if the existing zip is up to date
+    """
+    if not force and output_zip.is_file():
+        try:
+            with zipfile.ZipFile(output_zip) as zipf:
+                up_to_date = zipf.comment == EXTENSION_DIGEST
+        except zipfile.BadZipFile:
+            up_to_date = False
+        
+        if up_to_date:
+            console.print(f"[green]✓[/green] Extension already up to date: {output_zip}")
+            return output_zip
+    
+    console.print(f"[cyan]Packaging extension to: {output_zip}[/cyan]")
+    
+    with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zipf:
+        _write_assets(zipf)
+        zipf.comment = EXTENSION_DIGEST
+    
+    file_size = output_zip.stat().st_size / 1024  # KB
+    console.print(f"[green]✓[/green] Extension packaged: {output_zip} ({file_size:.1f} KB)")
+    
+    return output_zip
+
+
 def package_extension(extension_dir: Path, output_zip: Path = Path("stealth-extension.zip")):
     """Package extension directory into a zip file.
     
@@ -343,11 +544,8 @@ def package_extension(extension_dir: Path, output_zip: Path = Path("stealth-exte
     """
     console.print(f"[cyan]Packaging extension to: {output_zip}[/cyan]")
     
-    with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in extension_dir.rglob('*'):
-            if file_path.is_file():
-                arcname = file_path.relative_to(extension_dir)
-                zipf.write(file_path, arcname)
+    with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zipf:
+        _write_directory(zipf, extension_dir)
     
     file_size = output_zip.stat().st_size / 1024  # KB
     console.print(f"[green]✓[/green] Extension packaged: {output_zip} ({file_size:.1f} KB)")
@@ -355,15 +553,56 @@ def package_extension(extension_dir: Path, output_zip: Path = Path("stealth-exte
     return output_zip
 
 
+def package_extension_to_s3(
+    bucket: str,
+    key: str = "extensions/stealth-extension.zip",
+    extension_dir: Optional[Path] = None,
+    region: Optional[str] = None,
+    s3_client=None
+) -> str:
+    """Package the extension in memory and upload it to S3 without a temp file.
+    
+    Args:
+        bucket: S3 bucket name
+        key: S3 object key
+        extension_dir: Extension directory (uses the built-in stealth files if None)
+        region: AWS region for the S3 client (ignored if s3_client is given)
+        s3_client: Existing boto3 S3 client to reuse
+        
+    Returns:
+        S3 URI of uploaded extension
+    """
+    console.print(f"[cyan]Packaging extension to: s3://{bucket}/{key}[/cyan]")
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zipf:
+        if extension_dir is None:
+            _write_assets(zipf)
+        else:
+            _write_directory(zipf, extension_dir)
+    
+    file_size = buffer.tell() / 1024  # KB
+    buffer.seek(0)
+    
+    if s3_client is None:
+        # Only uploads need boto3; keep it off the import path
+        from aws_session import get_client
+        s3_client = get_client('s3', region)
+    
+    s3_client.upload_fileobj(buffer, bucket, key, ExtraArgs={'ContentType': 'application/zip'})
+    
+    s3_uri = f"s3://{bucket}/{key}"
+    console.print(f"[green]✓[/green] Extension uploaded: {s3_uri} ({file_size:.1f} KB)")
+    
+    return s3_uri
+
+
 def main():
     """Create and package stealth extension."""
     console.print("\n[bold cyan]🕵️  Creating Stealth Extension[/bold cyan]\n")
     
-    # Create extension
-    extension_dir = create_stealth_extension()
-    
-    # Package extension
-    zip_path = package_extension(extension_dir)
+    # Package extension straight from the in-memory assets
+    zip_path = build_extension_zip()
     
     console.print("\n[green]✓ Stealth extension ready![/green]")
     console.print(f"\n[cyan]Usage:[/cyan]")
@@ -373,6 +612,7 @@ def main():
     console.print("  • Modifies User-Agent header")
     console.print("  • Randomizes canvas fingerprinting")
     console.print("  • Overrides WebGL fingerprinting")
+    console.print("  • Bulk DOM actions via runtime message {action: 'bulk', ops: [...]}")
     console.print("  • Makes browser appear more human-like")
 
 
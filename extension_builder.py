@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Build helpers shared by setup_extension.py and setup_bedrock_summary_extension.py.
+
+Both modules build the same Bedrock Summary extension; the STS, npm,
+credential-injection and packaging steps they have in common live here.
+"""
+
+import os
+import json
+import uuid
+import time
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# zipfile and aws_session (and with it boto3) are imported on first use, so
+# callers that only need the constants or npm helpers don't pay for them
+
+# GitHub repository of the Bedrock Summary extension
+REPO_SLUG = "aws-samples/amazon-bedrock-summary-client-for-chrome"
+REPO_URL = f"https://github.com/{REPO_SLUG}.git"
+REPO_NAME = "amazon-bedrock-summary-client-for-chrome"
+
+# Default-branch tarball, for callers that need the tree but not git metadata
+REPO_TARBALL_URL = f"https://codeload.github.com/{REPO_SLUG}/tar.gz/HEAD"
+
+# Fast deflate: the zip is built once and unpacked by Chrome, so higher
+# levels cost CPU for little size gain
+ZIP_COMPRESSLEVEL = 1
+
+# Already-compressed formats are stored as-is: deflating them burns CPU for
+# no size gain
+INCOMPRESSIBLE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff", ".woff2", ".gz", ".zip", ".br"}
+
+# Threads reading files ahead of the thread writing the zip
+ZIP_WORKERS = min(4, os.cpu_count() or 1)
+
+# Files each worker may have read and waiting for the writer thread
+ZIP_QUEUE_DEPTH = 4
+
+# Larger files are streamed from disk by zipfile instead of being read into
+# memory by a worker
+ZIP_PARALLEL_MAX_FILE_SIZE = 16 * 1024 * 1024
+
+# Name prefix of directories renamed aside by remove_tree_in_background(),
+# followed by the rename's Unix time
+TRASH_PREFIX = ".bedrock-ext-trash-"
+
+# Trash left by other runs is swept once it is this old; younger trash may
+# still be being deleted by a running process
+TRASH_MAX_AGE_SECONDS = 3600
+
+
+def get_session_credentials(duration_seconds: int = 3600) -> Dict[str, str]:
+    """Get temporary AWS credentials from STS GetSessionToken.
+    
+    Args:
+        duration_seconds: Credential validity duration (default: 1 hour)
+    
+    Returns:
+        Dict with AccessKeyId, SecretAccessKey, SessionToken and Expiration
+    """
+    from aws_session import get_client
+    
+    response = get_client('sts').get_session_token(DurationSeconds=duration_seconds)
+    credentials = response['Credentials']
+    return {
+        'AccessKeyId': credentials['AccessKeyId'],
+        'SecretAccessKey': credentials['SecretAccessKey'],
+        'SessionToken': credentials['SessionToken'],
+        'Expiration': credentials['Expiration']
+    }
+
+
+def _remove_trees(paths: Iterable[Path]) -> None:
+    """rmtree each path, ignoring errors (best effort)."""
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _is_stale_trash(path: Path, now: float) -> bool:
+    """Whether path is trash renamed aside over TRASH_MAX_AGE_SECONDS ago."""
+    renamed_at, _, _ = path.name[len(TRASH_PREFIX):].partition('-')
+    try:
+        return now - int(renamed_at) > TRASH_MAX_AGE_SECONDS
+    except ValueError:
+        return False
+
+
+def remove_tree_in_background(path: Path) -> None:
+    """Move a directory aside at once and delete it on a background thread.
+    
+    The rename frees path immediately, e.g. for a fresh clone, instead of
+    waiting for rmtree to unlink every file in node_modules. The thread is
+    not a daemon, so the interpreter finishes the delete before exiting.
+    Trash a killed process left behind in the same parent directory is
+    swept too, once older than TRASH_MAX_AGE_SECONDS.
+    
+    Args:
+        path: Directory to remove
+    """
+    now = time.time()
+    trash = path.with_name(f"{TRASH_PREFIX}{int(now)}-{uuid.uuid4().hex}")
+    try:
+        path.rename(trash)
+    except OSError:
+        # Can't rename (e.g. permissions): delete in place
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    
+    stale = [old for old in path.parent.glob(f"{TRASH_PREFIX}*") if _is_stale_trash(old, now)]
+    threading.Thread(target=_remove_trees, args=([trash, *stale],)).start()
+
+
+def write_atomic(path: Path, chunks: Iterable[bytes]) -> None:
+    """Write chunks to path through a temporary sibling and os.replace.
+    
+    The file is either fully old or fully new, even if the run is killed
+    mid-write. An existing file keeps its permission bits.
+    
+    Args:
+        path: Destination file
+        chunks: Bytes-like pieces of the new contents, in order
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(chunks)
+        if path.exists():
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def npm_install_command(repo_dir: Path) -> List[str]:
+    """Return the npm command that installs dependencies for repo_dir.
+    
+    npm ci installs straight from the lockfile without re-resolving, so it is
+    used whenever package-lock.json exists.
+    """
+    if (repo_dir / "package-lock.json").exists():
+        return ["npm", "ci", "--prefer-offline", "--no-audit", "--no-fund"]
+    return ["npm", "install"]
+
+
+def credentials_literal(credentials: Dict[str, str]) -> str:
+    """JavaScript object literal of credentials, in the extension's key names.
+    
+    Build it once per set of credentials and pass it to credentials_snippet()
+    for each injection site.
+    
+    Args:
+        credentials: AWS credentials dict
+    
+    Returns:
+        JSON object literal
+    """
+    return json.dumps({
+        'accessKeyId': credentials['AccessKeyId'],
+        'secretAccessKey': credentials['SecretAccessKey'],
+        'sessionToken': credentials['SessionToken']
+    })
+
+
+def credentials_snippet(credentials_literal: str, log_message: str) -> str:
+    """JavaScript that stores credentials in localStorage under 'keys'.
+    
+    Args:
+        credentials_literal: Object literal from credentials_literal()
+        log_message: Message logged to the console once stored
+    
+    Returns:
+        Self-invoking function, ending with a newline
+    """
+    return f"""(function() {{
+    const credentials = {credentials_literal};
+    localStorage.setItem('keys', JSON.stringify(credentials));
+    console.log({json.dumps(log_message)});
+}})();
+"""
+
+
+def _iter_extension_files(source_dir: Path, skip_dev_files: bool) -> Iterator[Tuple[str, str]]:
+    """Yield (path, arcname) for every file zip_directory packages.
+    
+    Symlinked directories are skipped; with skip_dev_files, so are hidden
+    entries, node_modules and source maps.
+    """
+    # Breadth-first scandir walk: DirEntry caches the file type from
+    # readdir, so filtering costs no extra stat calls
+    pending = deque([(str(source_dir), "")])
+    while pending:
+        dir_path, arc_dir = pending.popleft()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                # Skip hidden entries
+                if skip_dev_files and entry.name.startswith('.'):
+                    continue
+                
+                arcname = arc_dir + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    # Skip node_modules
+                    if not (skip_dev_files and entry.name == 'node_modules'):
+                        pending.append((entry.path, arcname + "/"))
+                    continue
+                
+                # Skip symlinked directories, and source maps
+                if not entry.is_file() or (skip_dev_files and entry.name.endswith('.map')):
+                    continue
+                
+                yield entry.path, arcname
+
+
+def _read_entry(path: str, arcname: str):
+    """Stat and read one file for zip_directory's writer thread.
+    
+    Returns:
+        Tuple of (ZipInfo for the entry, file contents)
+    """
+    import zipfile
+    
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    with open(path, 'rb') as f:
+        return zinfo, f.read()
+
+
+def zip_directory(
+    source_dir: Path,
+    output_path: Path,
+    compress: bool = True,
+    skip_dev_files: bool = False
+) -> int:
+    """Zip an extension directory.
+    
+    Already-compressed assets are stored without deflating. Files are read
+    on ZIP_WORKERS threads while this thread compresses and appends them in
+    walk order through ZipFile's public API, which also handles ZIP64.
+    
+    Args:
+        source_dir: Directory whose contents become the zip root
+        output_path: Output zip file path
+        compress: Deflate the zip (stored uncompressed if False)
+        skip_dev_files: Leave out hidden entries, node_modules and source
+            maps; meant for build output, not for extensions supplied as-is
+    
+    Returns:
+        Number of files added
+    """
+    import zipfile
+    
+    if compress:
+        zip_args = {'compression': zipfile.ZIP_DEFLATED, 'compresslevel': ZIP_COMPRESSLEVEL}
+    else:
+        zip_args = {'compression': zipfile.ZIP_STORED}
+    
+    added = 0
+    # (path, arcname, Future of _read_entry or None, compress_type), oldest
+    # first; None entries are read by zipfile itself
+    queued = deque()
+    
+    def write_oldest():
+        path, arcname, reading, compress_type = queued.popleft()
+        if reading is None:
+            zipf.write(path, arcname, compress_type=compress_type)
+        else:
+            zinfo, data = reading.result()
+            zipf.writestr(zinfo, data, compress_type=compress_type, compresslevel=ZIP_COMPRESSLEVEL)
+    
+    with zipfile.ZipFile(output_path, 'w', **zip_args) as zipf, \
+            ThreadPoolExecutor(max_workers=ZIP_WORKERS) as executor:
+        for path, arcname in _iter_extension_files(source_dir, skip_dev_files):
+            if not compress or os.path.splitext(arcname)[1].lower() in INCOMPRESSIBLE_SUFFIXES:
+                compress_type = zipfile.ZIP_STORED
+            else:
+                compress_type = zipfile.ZIP_DEFLATED
+            
+            if os.path.getsize(path) > ZIP_PARALLEL_MAX_FILE_SIZE:
+                # Streamed by zipfile rather than read whole into memory
+                queued.append((path, arcname, None, compress_type))
+            else:
+                queued.append((path, arcname, executor.submit(_read_entry, path, arcname), compress_type))
+            added += 1
+            
+            # Bound the file data waiting to be written
+            if len(queued) >= ZIP_WORKERS * ZIP_QUEUE_DEPTH:
+                write_oldest()
+        
+        while queued:
+            write_oldest()
+    
+    return added
@@ -27,10 +27,14 @@ Usage:
 
 import os
 import sys
+import time
+import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 from rich.console import Console
+from rich.logging import RichHandler
 from rich.panel import Panel
 from rich.prompt import Confirm
 from dotenv import load_dotenv
@@ -44,6 +48,10 @@ from s3_manager import S3Manager
 from browser_with_extension import BrowserWithExtension, check_iam_permissions
 
 console = Console()
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent extension uploads
+MAX_UPLOAD_WORKERS = 8
 
 
 class ExtensionDemo:
@@ -56,7 +64,8 @@ class ExtensionDemo:
         bucket_name: Optional[str] = None,
         region: Optional[str] = None,
         existing_extensions: Optional[list] = None,
-        skip_credentials: bool = False
+        skip_credentials: bool = False,
+        use_crt: bool = False
     ):
         """Initialize demo.
         
@@ -65,11 +74,13 @@ class ExtensionDemo:
             region: AWS region (uses AWS_REGION env var if None)
             existing_extensions: List of paths to existing extension zips
             skip_credentials: Skip AWS credential configuration
+            use_crt: Upload extensions with the AWS CRT transfer client
         """
         self.bucket_name = bucket_name or os.environ.get('S3_BUCKET_NAME', self.DEFAULT_BUCKET)
         self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
         self.existing_extensions = existing_extensions or []
         self.skip_credentials = skip_credentials
+        self.use_crt = use_crt
         
         self.extension_zips = []  # List of prepared extension zips
         self.s3_uris = []  # List of S3 URIs
@@ -127,22 +138,35 @@ class ExtensionDemo:
             True if successful
         """
         try:
-            for ext_path in self.existing_extensions:
-                setup = ExtensionSetup()
-                
-                extension_zip = setup.prepare_extension(
-                    existing_extension=ext_path,
-                    skip_credentials=self.skip_credentials
+            # Each ExtensionSetup has its own work dir, so one per extension
+            setups = [ExtensionSetup() for _ in self.existing_extensions]
+            
+            # One set of temporary credentials is shared by every extension
+            credentials = None
+            if not self.skip_credentials and setups:
+                credentials = setups[0].get_temporary_credentials()
+            
+            # Extensions are independent, so prepare them concurrently. Output
+            # names are indexed: auto-generated ones only carry a timestamp.
+            timestamp = int(time.time())
+            
+            def prepare(index: int) -> Path:
+                return setups[index].prepare_extension(
+                    existing_extension=self.existing_extensions[index],
+                    skip_credentials=self.skip_credentials,
+                    credentials=credentials,
+                    output_path=Path(f"bedrock-summary-extension-{timestamp}-{index + 1}.zip")
                 )
-                
-                self.extension_zips.append(extension_zip)
+            
+            workers = len(setups) or 1
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                self.extension_zips.extend(executor.map(prepare, range(len(setups))))
             
             return True
             
         except Exception as e:
             console.print(f"\n[red]✗ Extension preparation failed: {e}[/red]")
-            import traceback
-            console.print(f"[dim]{traceback.format_exc()}[/dim]")
+            logger.exception("Extension preparation failed")
             return False
     
     def upload_to_s3(self) -> bool:
@@ -152,26 +176,44 @@ class ExtensionDemo:
             True if successful
         """
         try:
-            manager = S3Manager(self.bucket_name, self.region)
+            manager = S3Manager(self.bucket_name, self.region, use_crt=self.use_crt)
             
-            for extension_zip in self.extension_zips:
-                s3_uri = manager.setup_and_upload(extension_zip)
-                
-                if not s3_uri:
-                    return False
-                
-                self.s3_uris.append(s3_uri)
+            console.print("\n[bold cyan]☁️  Setting up S3 Storage[/bold cyan]\n")
+            
+            # The bucket only needs to be checked once for all extensions
+            if not manager.create_bucket():
+                return False
+            
+            # Upload concurrently; one shared (thread-safe) S3 client
+            s3_uris = [None] * len(self.extension_zips)
+            workers = min(MAX_UPLOAD_WORKERS, len(self.extension_zips)) or 1
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(manager.upload_extension, extension_zip): index
+                    for index, extension_zip in enumerate(self.extension_zips)
+                }
+                for future in as_completed(futures):
+                    try:
+                        s3_uris[futures[future]] = future.result()
+                    except Exception:
+                        pass  # Already reported by upload_extension
+            
+            if not all(s3_uris):
+                return False
+            
+            # Keep S3 URIs in the same order as the extensions
+            self.s3_uris.extend(s3_uris)
+            console.print("\n[green]✓ S3 setup complete![/green]\n")
             
             # Optional: cleanup old extensions
             if Confirm.ask("\n[cyan]Clean up old extension versions?[/cyan]", default=False):
-                manager.cleanup_old_extensions(keep_latest=3)
+                manager.cleanup_old_extensions(keep_latest=3, exclude=self.s3_uris)
             
             return True
             
         except Exception as e:
             console.print(f"\n[red]✗ S3 upload failed: {e}[/red]")
-            import traceback
-            console.print(f"[dim]{traceback.format_exc()}[/dim]")
+            logger.exception("S3 upload failed")
             return False
     
     def create_browser(self) -> bool:
@@ -192,8 +234,7 @@ class ExtensionDemo:
             
         except Exception as e:
             console.print(f"\n[red]✗ Browser creation failed: {e}[/red]")
-            import traceback
-            console.print(f"[dim]{traceback.format_exc()}[/dim]")
+            logger.exception("Browser creation failed")
             return False
     
     def test_extension(self) -> bool:
@@ -317,8 +358,7 @@ class ExtensionDemo:
             
         except Exception as e:
             console.print(f"\n[bold red]Unexpected error:[/bold red] {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Unexpected error")
             return 1
             
         finally:
@@ -376,13 +416,37 @@ Examples:
         help="Skip AWS credential configuration in extension"
     )
     
+    parser.add_argument(
+        "--crt",
+        action="store_true",
+        help="Upload extensions with the AWS CRT transfer client (requires boto3[crt])"
+    )
+    
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log details, including tracebacks of failed steps"
+    )
+    
     args = parser.parse_args()
     
+    # Tracebacks are only rendered with --verbose
+    if args.verbose:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(message)s",
+            handlers=[RichHandler(console=console, rich_tracebacks=True)]
+        )
+    else:
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+    
     demo = ExtensionDemo(
         bucket_name=args.bucket,
         region=args.region,
         existing_extensions=args.extension_zips,
-        skip_credentials=args.skip_credentials
+        skip_credentials=args.skip_credentials,
+        use_crt=args.crt
     )
     
     sys.exit(demo.run(prepare_only=args.prepare_only))
@@ -2,29 +2,178 @@
 """S3 bucket management for extension storage."""
 
 import os
+import gzip
+import hashlib
+import shutil
+import tempfile
+import functools
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from rich.console import Console
 
+from aws_session import create_client
+
 console = Console()
 
+MB = 1024 * 1024
+
+# Multipart settings for extension uploads: large bundles (WASM, models)
+# are split into 16 MB parts uploaded 10 at a time
+MULTIPART_THRESHOLD = 8 * MB
+MULTIPART_CHUNKSIZE = 16 * MB
+MAX_TRANSFER_CONCURRENCY = 10
+
+# Object metadata key holding the SHA-256 of the uploaded zip
+CONTENT_SHA256_METADATA = 'content-sha256'
+HASH_READ_SIZE = 1 * MB
+
+# Content-addressed keys never change contents, so caches may keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# gzip level for compressed uploads, and how much of the compressed body is
+# buffered in memory before spilling to a temp file
+GZIP_COMPRESSLEVEL = 6
+GZIP_SPOOL_MAX_SIZE = 16 * MB
+
+# DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+# Connection pool size for the S3 client: room for several extensions
+# uploading MAX_TRANSFER_CONCURRENCY parts each (botocore default is 10)
+S3_MAX_POOL_CONNECTIONS = 32
+
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_s3_client(region: str):
+    """Cached S3 client for a region (clients are thread-safe)."""
+    return create_client('s3', region_name=region, config=S3_CLIENT_CONFIG)
+
+
+def content_key(digest: str, suffix: str = '.zip') -> str:
+    """Content-addressed S3 key for an extension zip.
+    
+    Only the digest goes into the key: callers name their zips per run (e.g.
+    with a timestamp), so including the file name would give identical
+    contents a new key every run and defeat the unchanged-upload check.
+    
+    Args:
+        digest: Hex SHA-256 of the zip
+        suffix: Key suffix
+    
+    Returns:
+        S3 object key
+    """
+    return f"extensions/{digest}{suffix}"
+
+
+def file_sha256(path: Path) -> str:
+    """Stream a file through SHA-256.
+    
+    Args:
+        path: File to hash
+        
+    Returns:
+        Hex digest
+    """
+    with path.open('rb') as f:
+        return _stream_sha256(f)
+
+
+def _stream_sha256(f: BinaryIO) -> str:
+    """Hash an open binary file from its current position to EOF."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(HASH_READ_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_transfer_config(use_crt: bool = False) -> TransferConfig:
+    """TransferConfig for extension uploads.
+    
+    With preferred_transfer_client='crt', s3transfer rejects any explicitly
+    set option the CRT client doesn't support (use_threads, max_io_queue,
+    ...), so only CRT-compatible options are passed. use_threads already
+    defaults to True for the classic client.
+    
+    Args:
+        use_crt: Prefer the AWS CRT transfer client
+    
+    Returns:
+        TransferConfig
+    """
+    return TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=MULTIPART_CHUNKSIZE,
+        max_concurrency=MAX_TRANSFER_CONCURRENCY,
+        preferred_transfer_client='crt' if use_crt else 'auto'
+    )
+
 
 class S3Manager:
     """Manage S3 bucket for extension storage."""
     
-    def __init__(self, bucket_name: str, region: Optional[str] = None):
+    def __init__(
+        self,
+        bucket_name: str,
+        region: Optional[str] = None,
+        boto3_session: Optional[boto3.Session] = None,
+        prewarm: bool = True,
+        use_crt: bool = False
+    ):
         """Initialize S3 manager.
         
         Args:
             bucket_name: S3 bucket name
             region: AWS region (uses AWS_REGION env var if None)
+            boto3_session: Session to create the client from (uses a shared,
+                cached client if None)
+            prewarm: Open a connection to the bucket endpoint in the
+                background, so the first real request skips the TLS handshake
+            use_crt: Upload through the AWS CRT transfer client (needs
+                boto3[crt]; uploads raise MissingDependencyException
+                without it)
         """
         self.bucket_name = bucket_name
         self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
-        self.s3_client = boto3.client('s3', region_name=self.region)
+        if boto3_session is not None:
+            self.s3_client = boto3_session.client(
+                's3',
+                region_name=self.region,
+                config=S3_CLIENT_CONFIG
+            )
+        else:
+            self.s3_client = _get_s3_client(self.region)
+        self.use_crt = use_crt
+        self.transfer_config = build_transfer_config(use_crt)
+        self._bucket_verified = False  # Set once create_bucket() succeeds
         
+        if prewarm:
+            threading.Thread(target=self._prewarm_connection, daemon=True).start()
+    
+    def _prewarm_connection(self):
+        """Open a keep-alive connection to the bucket endpoint.
+        
+        HeadBucket goes to the same virtual host as the uploads (unlike
+        ListBuckets), so the pooled connection is reused by them. Errors are
+        ignored: the real requests will report them.
+        """
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+        except Exception:
+            pass
+    
     def bucket_exists(self) -> bool:
         """Check if bucket exists.
         
@@ -47,6 +196,21 @@ class S3Manager:
     def create_bucket(self) -> bool:
         """Create S3 bucket if it doesn't exist.
         
+        The outcome is remembered, so later calls on the same manager don't
+        repeat the HeadBucket check.
+        
+        Returns:
+            True if bucket was created or already exists
+        """
+        if self._bucket_verified:
+            return True
+        
+        self._bucket_verified = self._create_bucket()
+        return self._bucket_verified
+    
+    def _create_bucket(self) -> bool:
+        """Check for the bucket and create it if missing.
+        
         Returns:
             True if bucket was created or already exists
         """
@@ -86,34 +250,155 @@ class S3Manager:
                 console.print(f"[red]✗[/red] Failed to create bucket: {e}")
                 raise
     
-    def upload_extension(self, extension_path: Path, key: Optional[str] = None) -> str:
+    def upload_extension(
+        self,
+        extension_path: Path,
+        key: Optional[str] = None,
+        compressed: bool = False
+    ) -> str:
         """Upload extension zip to S3.
         
         Args:
             extension_path: Path to extension zip file
-            key: S3 object key (uses filename if None)
+            key: S3 object key (if None, the content-addressed key
+                extensions/<sha256>.zip is used, so unchanged zips map to
+                the same object across runs and new contents never overwrite it)
+            compressed: gzip the zip on the way up and store it under a
+                '.gz' key with Content-Encoding: gzip. Only useful when the
+                consumer decodes Content-Encoding and the zip's entries
+                are lightly compressed (e.g. ZIP_STORED or level 1)
             
         Returns:
             S3 URI of uploaded extension
         """
-        if key is None:
-            key = f"extensions/{extension_path.name}"
+        # The file is opened once: hashed, then uploaded from the same handle
+        with extension_path.open('rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            digest = _stream_sha256(f)
+            
+            if key is None:
+                key = content_key(digest, extension_path.suffix)
+            if compressed:
+                key += '.gz'
+            
+            # Skip the upload when S3 already holds these exact bytes
+            if self._stored_digest(key) == digest:
+                s3_uri = f"s3://{self.bucket_name}/{key}"
+                console.print(f"[green]✓[/green] Extension unchanged, skipping upload")
+                console.print(f"[dim]S3 URI: {s3_uri}[/dim]")
+                return s3_uri
+            
+            f.seek(0)
+            metadata = {CONTENT_SHA256_METADATA: digest}
+            if compressed:
+                return self._upload_compressed(f, file_size, key, metadata)
+            return self._upload_fileobj(f, file_size, key, metadata)
+    
+    def _upload_fileobj(self, f: BinaryIO, file_size: int, key: str, metadata: dict) -> str:
+        """Upload an open extension zip as-is.
         
+        Args:
+            f: Extension zip opened in binary mode, positioned at the start
+            file_size: Size of the zip in bytes
+            key: S3 object key
+            metadata: Object metadata to store with the upload
+            
+        Returns:
+            S3 URI of uploaded extension
+        """
         console.print(f"[cyan]Uploading extension to S3...[/cyan]")
         console.print(f"[dim]Bucket: {self.bucket_name}[/dim]")
         console.print(f"[dim]Key: {key}[/dim]")
+        console.print(f"[dim]Uploading {file_size / MB:.2f} MB...[/dim]")
+        
+        object_args = {
+            'ContentType': 'application/zip',
+            'CacheControl': IMMUTABLE_CACHE_CONTROL,
+            'Metadata': metadata
+        }
         
         try:
-            # Upload file
-            file_size = extension_path.stat().st_size / 1024 / 1024  # MB
-            console.print(f"[dim]Uploading {file_size:.2f} MB...[/dim]")
+            # Zips below the multipart threshold skip the transfer manager's
+            # thread orchestration and go up as one PutObject (keeping the
+            # client's retries); the CRT client is faster at every size
+            if file_size < MULTIPART_THRESHOLD and not self.use_crt:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=f,
+                    **object_args
+                )
+            else:
+                self.s3_client.upload_fileobj(
+                    f,
+                    self.bucket_name,
+                    key,
+                    ExtraArgs=object_args,
+                    Config=self.transfer_config
+                )
             
-            self.s3_client.upload_file(
-                str(extension_path),
-                self.bucket_name,
-                key,
-                ExtraArgs={'ContentType': 'application/zip'}
-            )
+            s3_uri = f"s3://{self.bucket_name}/{key}"
+            console.print(f"[green]✓[/green] Extension uploaded successfully")
+            console.print(f"[dim]S3 URI: {s3_uri}[/dim]")
+            
+            return s3_uri
+            
+        except Exception as e:
+            console.print(f"[red]✗[/red] Failed to upload extension: {e}")
+            raise
+    
+    def _stored_digest(self, key: str) -> Optional[str]:
+        """SHA-256 recorded on an existing object, if any.
+        
+        Args:
+            key: S3 object key
+            
+        Returns:
+            Hex digest from the object's metadata, or None if the object is
+            missing or was uploaded without one
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError:
+            return None
+        return response.get('Metadata', {}).get(CONTENT_SHA256_METADATA)
+    
+    def _upload_compressed(self, f: BinaryIO, file_size: int, key: str, metadata: dict) -> str:
+        """Stream-gzip an extension zip and upload it with Content-Encoding: gzip.
+        
+        Args:
+            f: Extension zip opened in binary mode, positioned at the start
+            file_size: Size of the zip in bytes
+            key: S3 object key
+            metadata: Object metadata to store with the upload
+            
+        Returns:
+            S3 URI of uploaded extension
+        """
+        console.print(f"[cyan]Uploading compressed extension to S3...[/cyan]")
+        console.print(f"[dim]Bucket: {self.bucket_name}[/dim]")
+        console.print(f"[dim]Key: {key}[/dim]")
+        
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=GZIP_SPOOL_MAX_SIZE) as buf:
+                with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=GZIP_COMPRESSLEVEL) as gz:
+                    shutil.copyfileobj(f, gz)
+                
+                console.print(f"[dim]Uploading {buf.tell() / MB:.2f} MB (from {file_size / MB:.2f} MB)...[/dim]")
+                
+                buf.seek(0)
+                self.s3_client.upload_fileobj(
+                    buf,
+                    self.bucket_name,
+                    key,
+                    ExtraArgs={
+                        'ContentType': 'application/zip',
+                        'ContentEncoding': 'gzip',
+                        'CacheControl': IMMUTABLE_CACHE_CONTROL,
+                        'Metadata': metadata
+                    },
+                    Config=self.transfer_config
+                )
             
             s3_uri = f"s3://{self.bucket_name}/{key}"
             console.print(f"[green]✓[/green] Extension uploaded successfully")
@@ -125,33 +410,47 @@ class S3Manager:
             console.print(f"[red]✗[/red] Failed to upload extension: {e}")
             raise
     
-    def verify_access(self, s3_uri: str) -> bool:
+    @staticmethod
+    def parse_uri(s3_uri: str) -> Tuple[str, str]:
+        """Split an s3://bucket/key URI.
+        
+        Everything after the bucket is the key, taken verbatim ('?', '#' and
+        '%' are valid key characters).
+        
+        Args:
+            s3_uri: S3 URI
+            
+        Returns:
+            (bucket, key) tuple
+            
+        Raises:
+            ValueError: If the URI is not of the form s3://bucket/key
+        """
+        parts = urlsplit(s3_uri, allow_fragments=False)
+        key = s3_uri[len(f"s3://{parts.netloc}/"):]
+        if parts.scheme != 's3' or not parts.netloc or not key:
+            raise ValueError(f"Invalid S3 URI, expected s3://bucket/key: {s3_uri}")
+        return parts.netloc, key
+    
+    def verify_access(self, bucket: str, key: str) -> bool:
         """Verify that we can access the uploaded extension.
         
         Args:
-            s3_uri: S3 URI to verify
+            bucket: S3 bucket name
+            key: S3 object key (use parse_uri() to split an S3 URI)
             
         Returns:
             True if accessible
         """
         console.print(f"[cyan]Verifying S3 access...[/cyan]")
-        
-        # Parse S3 URI
-        if not s3_uri.startswith('s3://'):
-            console.print(f"[red]✗[/red] Invalid S3 URI: {s3_uri}")
-            return False
-        
-        parts = s3_uri[5:].split('/', 1)
-        bucket = parts[0]
-        key = parts[1] if len(parts) > 1 else ''
+        s3_uri = f"s3://{bucket}/{key}"
         
         try:
             # Try to get object metadata
             response = self.s3_client.head_object(Bucket=bucket, Key=key)
             
-            size = response['ContentLength'] / 1024 / 1024  # MB
             console.print(f"[green]✓[/green] S3 object accessible")
-            console.print(f"[dim]Size: {size:.2f} MB[/dim]")
+            console.print(f"[dim]Size: {response['ContentLength'] / MB:.2f} MB[/dim]")
             console.print(f"[dim]Last Modified: {response['LastModified']}[/dim]")
             
             return True
@@ -181,17 +480,14 @@ class S3Manager:
         if not self.create_bucket():
             return None
         
-        # Step 2: Upload extension
+        # Step 2: Upload extension. put_object and upload_fileobj only return
+        # once S3 has acknowledged the upload, so there is no separate
+        # HeadObject check
         try:
             s3_uri = self.upload_extension(extension_path)
         except Exception:
             return None
         
-        # Step 3: Verify access
-        if not self.verify_access(s3_uri):
-            console.print("[yellow]⚠ Upload succeeded but verification failed[/yellow]")
-            console.print("[dim]This may be a temporary issue, continuing anyway...[/dim]")
-        
         console.print("\n[green]✓ S3 setup complete![/green]\n")
         return s3_uri
     
@@ -199,48 +495,74 @@ class S3Manager:
         """List all extensions in the bucket.
         
         Returns:
-            List of extension object keys
+            List of extension object keys, newest first
+        """
+        return [obj['Key'] for obj in self.list_extension_objects()]
+    
+    def list_extension_objects(self) -> list:
+        """List all extension objects in the bucket, across every result page.
+        
+        Returns:
+            List of (Key, LastModified, Size) dicts, newest first
         """
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix='extensions/'
-            )
-            
-            if 'Contents' not in response:
-                return []
-            
-            return [obj['Key'] for obj in response['Contents']]
-            
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            objects = [
+                {'Key': obj['Key'], 'LastModified': obj['LastModified'], 'Size': obj['Size']}
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix='extensions/')
+                for obj in page.get('Contents', [])
+            ]
         except ClientError as e:
             console.print(f"[yellow]⚠ Failed to list extensions: {e}[/yellow]")
             return []
+        
+        objects.sort(key=lambda obj: obj['LastModified'], reverse=True)
+        return objects
     
-    def cleanup_old_extensions(self, keep_latest: int = 5):
+    def cleanup_old_extensions(self, keep_latest: int = 5, exclude: Iterable[str] = ()):
         """Clean up old extension versions, keeping only the latest N.
         
         Args:
             keep_latest: Number of latest versions to keep
+            exclude: Keys or S3 URIs that are never deleted (e.g. extensions in
+                use whose upload was skipped, so their LastModified is old)
         """
         console.print(f"[cyan]Cleaning up old extensions (keeping latest {keep_latest})...[/cyan]")
         
+        keep = {
+            self.parse_uri(item)[1] if item.startswith('s3://') else item
+            for item in exclude
+        }
+        
+        # Already sorted newest first by upload time
         extensions = self.list_extensions()
         if len(extensions) <= keep_latest:
             console.print(f"[green]✓[/green] Only {len(extensions)} extensions found, no cleanup needed")
             return
         
-        # Sort by name (which includes timestamp)
-        extensions.sort(reverse=True)
-        to_delete = extensions[keep_latest:]
+        to_delete = [key for key in extensions[keep_latest:] if key not in keep]
+        if not to_delete:
+            console.print(f"[green]✓[/green] All older extensions are in use, no cleanup needed")
+            return
         
         console.print(f"[dim]Deleting {len(to_delete)} old extensions...[/dim]")
         
-        for key in to_delete:
+        for start in range(0, len(to_delete), DELETE_BATCH_SIZE):
+            batch = to_delete[start:start + DELETE_BATCH_SIZE]
             try:
-                self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
-                console.print(f"[dim]Deleted: {key}[/dim]")
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
             except Exception as e:
-                console.print(f"[yellow]⚠ Failed to delete {key}: {e}[/yellow]")
+                console.print(f"[yellow]⚠ Failed to delete {len(batch)} extensions: {e}[/yellow]")
+                continue
+            
+            # Quiet mode only reports the keys that failed
+            errors = response.get('Errors', [])
+            for error in errors:
+                console.print(f"[yellow]⚠ Failed to delete {error['Key']}: {error.get('Message', error.get('Code'))}[/yellow]")
+            console.print(f"[dim]Deleted {len(batch) - len(errors)} of {len(batch)} extensions[/dim]")
         
         console.print(f"[green]✓[/green] Cleanup complete")
 
@@ -4,40 +4,149 @@
 Downloads, builds, and prepares the real Bedrock Summary Extension from GitHub.
 """
 
+import io
 import os
+import re
 import sys
 import shutil
+import hashlib
+import argparse
 import subprocess
-import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Dict, Optional, Set, Tuple, Union
 from rich.console import Console
-from rich.prompt import Confirm
+
+from extension_builder import (
+    REPO_NAME,
+    REPO_URL,
+    credentials_literal,
+    credentials_snippet,
+    get_session_credentials,
+    npm_install_command,
+    remove_tree_in_background,
+    write_atomic,
+    zip_directory,
+)
 
 console = Console()
 
+# Written into node_modules after a successful install; holds the lockfile hash
+INSTALL_STAMP = ".install-stamp"
+
+# node_modules archives (node_modules-<lockfile hash>.tar.zst), shared across
+# clones; XDG_CACHE_HOME lets CI mount a persistent cache
+NODE_MODULES_CACHE_DIR = Path(
+    os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+) / "bedrock-ext"
+
+# First line of a source file patched by inject_credentials_to_source; the
+# popup.js marker also carries a hash of the injected credentials
+PATCH_MARKER = "// __bedrock_patched_v2__"
+
+
+def _read_patch_marker(path: Path) -> Optional[str]:
+    """Return the first line of path if it is a PATCH_MARKER line, else None."""
+    with open(path, 'r', errors='ignore') as f:
+        first_line = f.readline().rstrip('\n')
+    return first_line if first_line.startswith(PATCH_MARKER) else None
+
+
+def _buffered_console() -> Console:
+    """Console that renders like `console` but into memory.
+    
+    Steps run side by side print to one of these; _flush_console() then
+    shows each step's output in one piece, in a fixed order.
+    """
+    return Console(
+        file=io.StringIO(),
+        force_terminal=console.is_terminal,
+        color_system=console.color_system,
+        width=console.width
+    )
+
+
+def _flush_console(buffered: Console) -> None:
+    """Write out everything printed to a _buffered_console()."""
+    console.file.write(buffered.file.getvalue())
+    console.file.flush()
+
+
+def _replace_literals(data: bytes, replacements: Dict[str, str], source_name: str) -> Tuple[bytes, Set[str]]:
+    """Replace every occurrence of several source snippets in one pass.
+    
+    Works on the raw UTF-8 bytes of the file, so it is never decoded.
+    Whitespace in a snippet matches any run of whitespace (or none), so an
+    upstream reformat doesn't silently turn a patch into a no-op; snippets
+    that still match nothing are reported.
+    
+    Args:
+        data: File contents to patch
+        replacements: Source snippet -> replacement
+        source_name: File name used in warnings
+    
+    Returns:
+        Tuple of (patched file contents, snippets that matched)
+    """
+    snippets = list(replacements)
+    encoded = [replacements[snippet].encode() for snippet in snippets]
+    pattern = re.compile(b"|".join(
+        b"(?P<p%d>" % index + rb"\s*".join(re.escape(token.encode()) for token in snippet.split()) + b")"
+        for index, snippet in enumerate(snippets)
+    ))
+    
+    matched = set()
+    
+    def substitute(match):
+        index = int(match.lastgroup[1:])
+        matched.add(snippets[index])
+        return encoded[index]
+    
+    data = pattern.sub(substitute, data)
+    for snippet in snippets:
+        if snippet not in matched:
+            console.print(f"[yellow]⚠ Patch site not found in {source_name}: {snippet.splitlines()[0]}[/yellow]")
+    return data, matched
+
 
 class BedrockSummaryExtensionSetup:
     """Setup Amazon Bedrock Summary Extension."""
     
-    REPO_URL = "https://github.com/aws-samples/amazon-bedrock-summary-client-for-chrome.git"
-    REPO_NAME = "amazon-bedrock-summary-client-for-chrome"
+    # Same repository ExtensionSetup builds (see extension_builder)
+    REPO_URL = REPO_URL
+    REPO_NAME = REPO_NAME
+    
+    # Sparse-checkout patterns (non-cone): everything except paths the
+    # build never reads, so their blobs are never downloaded
+    SPARSE_PATTERNS = ["/*", "!/.github/", "!/docs/", "!/screenshots/", "!/*.md"]
     
-    def __init__(self, work_dir: Path = Path(".")):
+    def __init__(self, work_dir: Path = Path("."), use_cache: bool = True, compress: bool = True):
         """Initialize setup.
         
         Args:
             work_dir: Working directory
+            use_cache: Reuse an existing clone and node_modules when they are
+                up to date (re-clone and reinstall from scratch if False)
+            compress: Deflate the packaged zip (stored uncompressed if False,
+                e.g. for quick local builds)
         """
         self.work_dir = work_dir
         self.repo_dir = self.work_dir / self.REPO_NAME
+        self.use_cache = use_cache
+        self.compress = compress
+        self._build_dir: Optional[Path] = None  # Set by build_extension()
         
-    def check_prerequisites(self) -> bool:
+    def check_prerequisites(self, output: Optional[Console] = None) -> bool:
         """Check if git and npm are installed.
         
+        Args:
+            output: Console to report to (the module console if None)
+        
         Returns:
             True if prerequisites are met
         """
-        console.print("\n[bold cyan]🔍 Checking Prerequisites[/bold cyan]\n")
+        out = output or console
+        out.print("\n[bold cyan]🔍 Checking Prerequisites[/bold cyan]\n")
         
         # Check git
         try:
@@ -47,12 +156,12 @@ class BedrockSummaryExtensionSetup:
                 text=True,
                 check=True
             )
-            console.print(f"[green]✓[/green] Git: {result.stdout.strip()}")
+            out.print(f"[green]✓[/green] Git: {result.stdout.strip()}")
         except (subprocess.CalledProcessError, FileNotFoundError):
-            console.print("[red]✗[/red] Git not found")
-            console.print("[yellow]Please install git:[/yellow]")
-            console.print("  macOS: brew install git")
-            console.print("  Linux: sudo apt-get install git")
+            out.print("[red]✗[/red] Git not found")
+            out.print("[yellow]Please install git:[/yellow]")
+            out.print("  macOS: brew install git")
+            out.print("  Linux: sudo apt-get install git")
             return False
         
         # Check npm
@@ -63,73 +172,241 @@ class BedrockSummaryExtensionSetup:
                 text=True,
                 check=True
             )
-            console.print(f"[green]✓[/green] npm: v{result.stdout.strip()}")
+            out.print(f"[green]✓[/green] npm: v{result.stdout.strip()}")
         except (subprocess.CalledProcessError, FileNotFoundError):
-            console.print("[red]✗[/red] npm not found")
-            console.print("[yellow]Please install Node.js and npm:[/yellow]")
-            console.print("  macOS: brew install node")
-            console.print("  Linux: sudo apt-get install nodejs npm")
-            console.print("  Or visit: https://nodejs.org/")
+            out.print("[red]✗[/red] npm not found")
+            out.print("[yellow]Please install Node.js and npm:[/yellow]")
+            out.print("  macOS: brew install node")
+            out.print("  Linux: sudo apt-get install nodejs npm")
+            out.print("  Or visit: https://nodejs.org/")
             return False
         
-        console.print("\n[green]✓ All prerequisites met![/green]\n")
+        out.print("\n[green]✓ All prerequisites met![/green]\n")
         return True
     
-    def clone_repository(self) -> bool:
+    def clone_repository(self, output: Optional[Console] = None) -> bool:
         """Clone the GitHub repository.
         
+        git's own output is captured rather than streamed, so it can't
+        break into other steps' output; it is shown only if the clone fails.
+        
+        Args:
+            output: Console to report to (the module console if None)
+        
         Returns:
             True if successful
         """
-        console.print("[bold cyan]📥 Cloning Repository[/bold cyan]\n")
+        out = output or console
+        out.print("[bold cyan]📥 Cloning Repository[/bold cyan]\n")
         
         if self.repo_dir.exists():
-            console.print(f"[yellow]Repository already exists: {self.repo_dir}[/yellow]")
-            if Confirm.ask("Delete and re-clone?", default=False):
-                console.print("[dim]Removing existing repository...[/dim]")
-                shutil.rmtree(self.repo_dir)
-            else:
-                console.print("[green]✓[/green] Using existing repository")
-                return True
+            if self.use_cache and (self.repo_dir / ".git").is_dir():
+                out.print(f"[dim]Repository already exists: {self.repo_dir}[/dim]")
+                return self.update_repository(out)
+            
+            out.print("[dim]Removing existing repository...[/dim]")
+            remove_tree_in_background(self.repo_dir)
         
-        console.print(f"[cyan]Cloning from: {self.REPO_URL}[/cyan]")
-        console.print(f"[dim]Destination: {self.repo_dir}[/dim]\n")
+        out.print(f"[cyan]Cloning from: {self.REPO_URL}[/cyan]")
+        out.print(f"[dim]Destination: {self.repo_dir}[/dim]\n")
         
         try:
+            # Partial clone: blobs are fetched only for the sparse paths
             subprocess.run(
-                ["git", "clone", "--depth", "1", self.REPO_URL],
+                ["git", "clone", "--depth", "1", "--filter=blob:none", "--sparse", self.REPO_URL, self.REPO_NAME],
                 cwd=self.work_dir,
+                capture_output=True,
                 check=True
             )
-            console.print(f"\n[green]✓[/green] Repository cloned successfully")
+            self._git("sparse-checkout", "set", "--no-cone", *self.SPARSE_PATTERNS)
+            out.print(f"\n[green]✓[/green] Repository cloned successfully")
+            return True
+            
+        except subprocess.CalledProcessError:
+            # Older git (no --sparse/--no-cone) or a server without partial clone
+            out.print("[yellow]⚠ Partial clone not supported, falling back to a full clone[/yellow]")
+            if self.repo_dir.exists():
+                remove_tree_in_background(self.repo_dir)
+        
+        try:
+            subprocess.run(
+                ["git", "clone", "--depth", "1", self.REPO_URL, self.REPO_NAME],
+                cwd=self.work_dir,
+                capture_output=True,
+                check=True
+            )
+            out.print(f"\n[green]✓[/green] Repository cloned successfully")
             return True
             
         except subprocess.CalledProcessError as e:
-            console.print(f"\n[red]✗[/red] Failed to clone repository: {e}")
+            out.print(f"\n[red]✗[/red] Failed to clone repository: {e}")
+            out.print(e.stderr.decode(errors='replace').rstrip(), markup=False, highlight=False)
             return False
     
+    def _git(self, *args: str) -> str:
+        """Run a git command in the repository and return its stdout."""
+        result = subprocess.run(
+            ["git", "-C", str(self.repo_dir), *args],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return result.stdout.strip()
+    
+    def update_repository(self, output: Optional[Console] = None) -> bool:
+        """Bring an existing shallow clone up to date with the remote.
+        
+        Nothing is downloaded when the local HEAD already matches the
+        remote's; otherwise only the new tip commit is fetched.
+        
+        Args:
+            output: Console to report to (the module console if None)
+        
+        Returns:
+            True if successful
+        """
+        out = output or console
+        try:
+            local_head = self._git("rev-parse", "HEAD")
+            remote_head = self._git("ls-remote", "origin", "HEAD").split()[0]
+            
+            if local_head == remote_head:
+                out.print(f"[green]✓[/green] Repository up to date ({local_head[:12]})")
+                return True
+            
+            out.print(f"[cyan]Updating repository to {remote_head[:12]}...[/cyan]")
+            self._git("fetch", "--depth", "1", "origin", "HEAD")
+            self._git("reset", "--hard", "FETCH_HEAD")
+            out.print("[green]✓[/green] Repository updated")
+            return True
+            
+        except (subprocess.CalledProcessError, IndexError) as e:
+            out.print(f"[red]✗[/red] Failed to update repository: {e}")
+            return False
+    
+    def _lockfile_hash(self) -> Optional[str]:
+        """BLAKE2b of package-lock.json (or package.json without a lockfile).
+        
+        Returns:
+            Hex digest, or None if neither file exists
+        """
+        for name in ("package-lock.json", "package.json"):
+            path = self.repo_dir / name
+            if path.exists():
+                return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+        return None
+    
     def install_dependencies(self) -> bool:
         """Install npm dependencies.
         
+        Skipped when node_modules was installed from the same lockfile.
+        
         Returns:
             True if successful
         """
         console.print("\n[bold cyan]📦 Installing Dependencies[/bold cyan]\n")
-        console.print("[dim]Running: npm install[/dim]")
+        
+        stamp_path = self.repo_dir / "node_modules" / INSTALL_STAMP
+        lockfile_hash = self._lockfile_hash()
+        if (
+            self.use_cache
+            and lockfile_hash
+            and stamp_path.exists()
+            and stamp_path.read_text().strip() == lockfile_hash
+        ):
+            console.print("[green]✓[/green] Dependencies up to date, skipping npm install")
+            return True
+        
+        # Archives are keyed by the exact lockfile and need the zstd binary
+        has_lockfile = (self.repo_dir / "package-lock.json").exists()
+        cache_path = None
+        if has_lockfile and shutil.which("zstd"):
+            cache_path = NODE_MODULES_CACHE_DIR / f"node_modules-{lockfile_hash}.tar.zst"
+        
+        if self.use_cache and cache_path and cache_path.exists() and self._restore_node_modules(cache_path):
+            self._write_install_stamp(stamp_path, lockfile_hash)
+            console.print(f"[green]✓[/green] Dependencies restored from cache: {cache_path}")
+            return True
+        
+        command = npm_install_command(self.repo_dir)
+        
+        console.print(f"[dim]Running: {' '.join(command)}[/dim]")
         console.print("[yellow]This may take a few minutes...[/yellow]\n")
         
         try:
             subprocess.run(
-                ["npm", "install"],
+                command,
                 cwd=self.repo_dir,
                 check=True
             )
+            if lockfile_hash:
+                self._write_install_stamp(stamp_path, lockfile_hash)
             console.print("\n[green]✓[/green] Dependencies installed successfully")
-            return True
             
         except subprocess.CalledProcessError as e:
             console.print(f"\n[red]✗[/red] Failed to install dependencies: {e}")
             return False
+        
+        if cache_path:
+            self._save_node_modules(cache_path)
+        return True
+    
+    def _write_install_stamp(self, stamp_path: Path, lockfile_hash: str):
+        """Record the lockfile node_modules was installed from.
+        
+        npm creates no node_modules for a lockfile without dependencies, so
+        the directory is created if needed.
+        """
+        stamp_path.parent.mkdir(exist_ok=True)
+        stamp_path.write_text(lockfile_hash)
+    
+    def _restore_node_modules(self, cache_path: Path) -> bool:
+        """Replace node_modules with the contents of a cached archive.
+        
+        Args:
+            cache_path: node_modules .tar.zst archive
+        
+        Returns:
+            True if the archive was extracted
+        """
+        node_modules = self.repo_dir / "node_modules"
+        if node_modules.exists():
+            remove_tree_in_background(node_modules)
+        
+        try:
+            subprocess.run(
+                ["tar", "--use-compress-program=zstd", "-xf", str(cache_path)],
+                cwd=self.repo_dir,
+                check=True,
+                capture_output=True
+            )
+            return True
+        except subprocess.CalledProcessError as e:
+            console.print(f"[yellow]⚠ Failed to restore dependency cache, reinstalling: {e}[/yellow]")
+            if node_modules.exists():
+                remove_tree_in_background(node_modules)
+            return False
+    
+    def _save_node_modules(self, cache_path: Path):
+        """Archive node_modules into the cache (best effort).
+        
+        Args:
+            cache_path: Destination .tar.zst archive
+        """
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            subprocess.run(
+                ["tar", "--use-compress-program=zstd", "-cf", str(tmp_path), "node_modules"],
+                cwd=self.repo_dir,
+                check=True,
+                capture_output=True
+            )
+            os.replace(tmp_path, cache_path)  # Readers never see a partial archive
+            console.print(f"[dim]Dependencies cached: {cache_path}[/dim]")
+        except (subprocess.CalledProcessError, OSError) as e:
+            console.print(f"[yellow]⚠ Failed to cache dependencies: {e}[/yellow]")
+            tmp_path.unlink(missing_ok=True)
     
     def build_extension(self, credentials=None) -> bool:
         """Build the extension.
@@ -142,25 +419,41 @@ class BedrockSummaryExtensionSetup:
         """
         console.print("\n[bold cyan]🔨 Building Extension[/bold cyan]\n")
         
-        # Inject credentials before building if provided
-        if credentials:
-            self.inject_credentials_to_source(credentials)
-        
-        console.print("[dim]Running: npm run build[/dim]\n")
-        
         try:
+            # Inject credentials before building if provided; otherwise undo
+            # any patch a previous run left in the reused clone
+            if credentials:
+                self.inject_credentials_to_source(credentials)
+            else:
+                self._restore_patched_sources()
+            
+            console.print("[dim]Running: npm run build[/dim]\n")
+            
             subprocess.run(
                 ["npm", "run", "build"],
                 cwd=self.repo_dir,
                 check=True
             )
+            # Probe once here so packaging doesn't have to
+            self._build_dir = self._probe_build_output()
             console.print("\n[green]✓[/green] Extension built successfully")
+            console.print(f"[dim]Build output: {self._build_dir}[/dim]")
             return True
             
         except subprocess.CalledProcessError as e:
             console.print(f"\n[red]✗[/red] Failed to build extension: {e}")
             return False
     
+    def _restore_patched_sources(self):
+        """Check out the pristine popup.js and sdk.js if a run patched them."""
+        patched = [
+            name for name in ("popup.js", "sdk.js")
+            if (self.repo_dir / name).exists() and _read_patch_marker(self.repo_dir / name)
+        ]
+        if patched:
+            self._git("checkout", "--", *patched)
+            console.print(f"[green]✓[/green] Restored unpatched {', '.join(patched)}")
+    
     def inject_credentials_to_source(self, credentials):
         """Inject AWS credentials into source code before building.
         
@@ -171,15 +464,10 @@ class BedrockSummaryExtensionSetup:
         
         # Update sdk.js to use Claude 3 instead of Claude v2.1
         sdk_js_path = self.repo_dir / "sdk.js"
-        if sdk_js_path.exists():
-            with open(sdk_js_path, 'r') as f:
-                sdk_js = f.read()
-            
-            # Replace Claude v2.1 with Claude 3 Haiku (faster and cheaper)
-            sdk_js = sdk_js.replace(
-                'modelId: "anthropic.claude-v2:1"',
-                'modelId: "anthropic.claude-3-haiku-20240307-v1:0"'
-            )
+        if sdk_js_path.exists() and _read_patch_marker(sdk_js_path):
+            console.print("[green]✓[/green] sdk.js already updated to Claude 3 Haiku")
+        elif sdk_js_path.exists():
+            sdk_js = sdk_js_path.read_bytes()
             
             # Update the prompt format for Claude 3 (uses messages API)
             # Replace the old prompt format with Claude 3 format
@@ -197,8 +485,6 @@ class BedrockSummaryExtensionSetup:
       }]
     })"""
             
-            sdk_js = sdk_js.replace(old_body, new_body)
-            
             # Update response parsing for Claude 3
             old_parse = """const jsonResult = JSON.parse(result);
         callback && callback(jsonResult);"""
@@ -211,20 +497,44 @@ class BedrockSummaryExtensionSetup:
           callback && callback(jsonResult);
         }"""
             
-            sdk_js = sdk_js.replace(old_parse, new_parse)
-            
-            with open(sdk_js_path, 'w') as f:
-                f.write(sdk_js)
+            sdk_replacements = {
+                # Replace Claude v2.1 with Claude 3 Haiku (faster and cheaper)
+                'modelId: "anthropic.claude-v2:1"': 'modelId: "anthropic.claude-3-haiku-20240307-v1:0"',
+                old_body: new_body,
+                old_parse: new_parse,
+            }
+            sdk_js, matched = _replace_literals(sdk_js, sdk_replacements, "sdk.js")
             
-            console.print("[green]✓[/green] Updated to Claude 3 Haiku model")
+            if len(matched) == len(sdk_replacements):
+                write_atomic(sdk_js_path, [f"{PATCH_MARKER}\n".encode(), sdk_js])
+                console.print("[green]✓[/green] Updated to Claude 3 Haiku model")
+            else:
+                # No marker, so the missing sites are retried on the next run;
+                # the applied replacements don't match their own snippets again
+                write_atomic(sdk_js_path, [sdk_js])
+                console.print("[yellow]⚠ sdk.js only partly updated to Claude 3 Haiku[/yellow]")
         
         popup_js_path = self.repo_dir / "popup.js"
         if not popup_js_path.exists():
             console.print("[yellow]⚠ popup.js not found, skipping credential injection[/yellow]")
             return
         
-        with open(popup_js_path, 'r') as f:
-            popup_js = f.read()
+        credentials_hash = hashlib.blake2b(
+            "\0".join(credentials[name] for name in ('AccessKeyId', 'SecretAccessKey', 'SessionToken')).encode(),
+            digest_size=16
+        ).hexdigest()
+        popup_marker = f"{PATCH_MARKER} {credentials_hash}"
+        
+        existing_marker = _read_patch_marker(popup_js_path)
+        if existing_marker == popup_marker:
+            console.print("[green]✓[/green] popup.js already holds these credentials")
+            return
+        if existing_marker:
+            # Patched on an earlier run with other credentials; patching again
+            # would inject the default rule twice, so start from the clean file
+            self._git("checkout", "--", "popup.js")
+        
+        popup_js = popup_js_path.read_bytes()
         
         # Strategy: Replace the line where regexp is set to include a better default value
         # Use a more comprehensive regex that captures more content
@@ -233,46 +543,38 @@ class BedrockSummaryExtensionSetup:
         
         default_regex = '<p>(.*?)</p>|<h[1-6]>(.*?)</h[1-6]>|<li>(.*?)</li>|<article>(.*?)</article>'
         
-        popup_js = popup_js.replace(
-            "regexp = currentSetting?.regexp || '';",
-            f"regexp = currentSetting?.regexp || '{default_regex}';"
-        )
-        
-        # Also set default rule in localStorage for current host
-        popup_js = popup_js.replace(
-            "if (currentHost) {",
-            f"""if (currentHost) {{
+        # popup.js is marked even if a site is missing: its patches match
+        # again, so re-patching must always start from the checked-out file
+        popup_js, _ = _replace_literals(popup_js, {
+            "regexp = currentSetting?.regexp || '';": f"regexp = currentSetting?.regexp || '{default_regex}';",
+            # Also set default rule in localStorage for current host
+            "if (currentHost) {": f"""if (currentHost) {{
     // Auto-inject default rule if not exists
     if (!localStorage.getItem(currentHost)) {{
       localStorage.setItem(currentHost, JSON.stringify({{ regexp: '{default_regex}' }}));
       console.log('Default rule set for: ' + currentHost);
-    }}"""
-        )
+    }}""",
+        }, "popup.js")
         
         # Inject AWS credentials at the beginning
-        credentials_init = f"""
-// Auto-injected AWS credentials
-(function() {{
-    const credentials = {{
-        accessKeyId: '{credentials['AccessKeyId']}',
-        secretAccessKey: '{credentials['SecretAccessKey']}',
-        sessionToken: '{credentials['SessionToken']}'
-    }};
-    localStorage.setItem('keys', JSON.stringify(credentials));
-    console.log('AWS credentials auto-configured');
-}})();
-
-"""
+        credentials_init = (
+            "\n// Auto-injected AWS credentials\n"
+            + credentials_snippet(credentials_literal(credentials), 'AWS credentials auto-configured')
+            + "\n"
+        )
         
-        # Insert at the beginning of the file (after imports)
-        import_end = popup_js.find("let i = 0;")
-        if import_end > 0:
-            popup_js = popup_js[:import_end] + credentials_init + popup_js[import_end:]
-        else:
-            popup_js = credentials_init + popup_js
+        # Insert at the beginning of the file (after imports); the pieces are
+        # written in sequence (memoryview slices don't copy) rather than
+        # concatenated into another copy
+        import_end = max(popup_js.find(b"let i = 0;"), 0)
+        popup_view = memoryview(popup_js)
         
-        with open(popup_js_path, 'w') as f:
-            f.write(popup_js)
+        write_atomic(popup_js_path, [
+            f"{popup_marker}\n".encode(),
+            popup_view[:import_end],
+            credentials_init.encode(),
+            popup_view[import_end:]
+        ])
         
         console.print("[green]✓[/green] Credentials and default rule injected into popup.js source")
         console.print("[dim]Default rule: <p>|<h1-6>|<li>|<article> - captures more content[/dim]")
@@ -281,6 +583,17 @@ class BedrockSummaryExtensionSetup:
     def find_build_output(self) -> Path:
         """Find the build output directory.
         
+        Returns the directory recorded by build_extension(), probing only
+        when no build ran in this process (e.g. packaging an earlier build).
+        
+        Returns:
+            Path to build output
+        """
+        return self._build_dir or self._probe_build_output()
+    
+    def _probe_build_output(self) -> Path:
+        """Look for manifest.json in the common build output directories.
+        
         Returns:
             Path to build output
         """
@@ -330,20 +643,10 @@ class BedrockSummaryExtensionSetup:
         output_path = self.work_dir / output_name
         console.print(f"[cyan]Creating zip: {output_path}[/cyan]\n")
         
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(build_dir):
-                # Skip node_modules and hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'node_modules']
-                
-                for file in files:
-                    # Skip hidden files and source maps
-                    if file.startswith('.') or file.endswith('.map'):
-                        continue
-                    
-                    file_path = Path(root) / file
-                    arcname = file_path.relative_to(build_dir)
-                    zipf.write(file_path, arcname)
-                    console.print(f"[dim]  Added: {arcname}[/dim]")
+        added = zip_directory(build_dir, output_path, compress=self.compress, skip_dev_files=True)
+        
+        # One summary line: printing each file is slow on large trees
+        console.print(f"[green]✓[/green] Added {added} files")
         
         file_size = output_path.stat().st_size / 1024 / 1024  # MB
         console.print(f"\n[green]✓[/green] Extension packaged: {output_path}")
@@ -354,23 +657,37 @@ class BedrockSummaryExtensionSetup:
         
         return output_path
     
-    def setup(self, credentials=None) -> Path:
+    def setup(
+        self,
+        credentials: Union[Dict[str, str], "Future", None] = None,
+        credentials_output: Optional[Console] = None
+    ) -> Path:
         """Complete setup workflow.
         
         Args:
-            credentials: Optional AWS credentials to inject
+            credentials: Optional AWS credentials to inject, or a Future
+                resolving to them (e.g. an STS call still in flight); it is
+                only waited on right before the build
+            credentials_output: _buffered_console() the task behind a
+                credentials Future prints to; shown once it has resolved
         
         Returns:
             Path to packaged extension zip, or None if failed
         """
         console.print("\n[bold cyan]🚀 Amazon Bedrock Summary Extension Setup[/bold cyan]")
         
-        # Step 1: Check prerequisites
-        if not self.check_prerequisites():
-            return None
-        
-        # Step 2: Clone repository
-        if not self.clone_repository():
+        # Steps 1-2: Check prerequisites and clone repository. They don't
+        # depend on each other, so the version probes overlap the clone;
+        # each reports into its own buffer, shown in step order afterwards
+        prerequisites_output = _buffered_console()
+        clone_output = _buffered_console()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            prerequisites = executor.submit(self.check_prerequisites, prerequisites_output)
+            cloned = executor.submit(self.clone_repository, clone_output)
+            wait([prerequisites, cloned])
+        _flush_console(prerequisites_output)
+        _flush_console(clone_output)
+        if not prerequisites.result() or not cloned.result():
             return None
         
         # Step 3: Install dependencies
@@ -378,6 +695,10 @@ class BedrockSummaryExtensionSetup:
             return None
         
         # Step 4: Build extension (with credentials if provided)
+        if isinstance(credentials, Future):
+            credentials = credentials.result()
+            if credentials_output is not None:
+                _flush_console(credentials_output)
         if not self.build_extension(credentials):
             return None
         
@@ -393,33 +714,60 @@ class BedrockSummaryExtensionSetup:
         return zip_path
 
 
-def main():
-    """Main entry point."""
-    import boto3
+def get_temporary_credentials(output: Optional[Console] = None) -> Optional[Dict[str, str]]:
+    """Get 1-hour temporary AWS credentials from STS.
     
-    # Get temporary credentials
-    console.print("\n[cyan]Getting temporary AWS credentials...[/cyan]")
+    Args:
+        output: Console to report to (the module console if None)
+    
+    Returns:
+        Dict with AccessKeyId, SecretAccessKey, SessionToken and Expiration,
+        or None if they couldn't be obtained
+    """
+    out = output or console
+    out.print("\n[cyan]Getting temporary AWS credentials...[/cyan]")
     try:
-        sts_client = boto3.client('sts')
-        response = sts_client.get_session_token(DurationSeconds=3600)
-        credentials = response['Credentials']
-        console.print(f"[green]✓[/green] Temporary credentials obtained (valid for 1 hour)")
-        console.print(f"[dim]Expires at: {credentials['Expiration']}[/dim]\n")
-        
-        creds = {
-            'AccessKeyId': credentials['AccessKeyId'],
-            'SecretAccessKey': credentials['SecretAccessKey'],
-            'SessionToken': credentials['SessionToken']
-        }
+        credentials = get_session_credentials(3600)
+        out.print(f"[green]✓[/green] Temporary credentials obtained (valid for 1 hour)")
+        out.print(f"[dim]Expires at: {credentials['Expiration']}[/dim]\n")
+        return credentials
     except Exception as e:
-        console.print(f"[yellow]⚠[/yellow] Failed to get credentials: {e}")
-        console.print("[dim]Building without credentials...[/dim]\n")
-        creds = None
+        out.print(f"[yellow]⚠[/yellow] Failed to get credentials: {e}")
+        out.print("[dim]Building without credentials...[/dim]\n")
+        return None
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Build the Amazon Bedrock Summary Extension"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-clone the repository and reinstall dependencies from scratch"
+    )
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Store files in the zip without compression (faster, larger)"
+    )
+    args = parser.parse_args()
+    
+    setup = BedrockSummaryExtensionSetup(
+        use_cache=not args.no_cache,
+        compress=not args.no_compress
+    )
     
-    setup = BedrockSummaryExtensionSetup()
+    # The STS call runs while the repository is checked and cloned; its
+    # output is held back until setup() needs the credentials
+    sts_output = _buffered_console()
+    sts_executor = ThreadPoolExecutor(max_workers=1)
+    pending_creds = sts_executor.submit(get_temporary_credentials, sts_output)
     
     try:
-        zip_path = setup.setup(credentials=creds)
+        zip_path = setup.setup(credentials=pending_creds, credentials_output=sts_output)
+        creds = pending_creds.result()
         
         if zip_path:
             console.print(f"\n[bold green]Success![/bold green]")
@@ -440,6 +788,8 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        sts_executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -1,34 +1,55 @@
 #!/usr/bin/env python3
 """Extension setup module - download, configure, and package Chrome extension."""
 
-import os
 import json
 import shutil
-import zipfile
 import tempfile
+from collections import deque
 from pathlib import Path
 from typing import Optional, Dict
-import boto3
 from rich.console import Console
 
+from extension_builder import (
+    REPO_TARBALL_URL,
+    REPO_URL,
+    credentials_literal,
+    credentials_snippet,
+    get_session_credentials,
+    npm_install_command,
+    remove_tree_in_background,
+    write_atomic,
+    zip_directory,
+)
+
 console = Console()
 
+# Lines of npm.log shown when an npm step fails
+NPM_LOG_TAIL_LINES = 50
+
+# Socket timeout while streaming the repository tarball
+DOWNLOAD_TIMEOUT_SECONDS = 60
+
 
 class ExtensionSetup:
     """Handle Chrome extension download, configuration, and packaging."""
     
-    # GitHub repository for the extension
-    GITHUB_REPO = "aws-samples/amazon-bedrock-summary-client-for-chrome"
-    
-    def __init__(self, work_dir: Optional[Path] = None):
+    def __init__(self, work_dir: Optional[Path] = None, compress: bool = True):
         """Initialize extension setup.
         
+        Each instance owns its own working directory, so use one per
+        extension.
+        
         Args:
             work_dir: Working directory for temporary files
+            compress: Deflate the packaged zip (stored uncompressed if False)
         """
+        self.compress = compress
         self.work_dir = work_dir or Path(tempfile.mkdtemp(prefix="extension_"))
         self.extension_dir = self.work_dir / "extension"
-        self.sts_client = boto3.client('sts')
+        self.npm_log = self.work_dir / "npm.log"
+        # Only our own build output is stripped of development files when
+        # packaged; an extension supplied by the user is zipped as-is
+        self._built_from_source = False
         
     def get_temporary_credentials(self, duration_seconds: int = 3600) -> Dict[str, str]:
         """Get temporary AWS credentials using STS.
@@ -37,24 +58,15 @@ class ExtensionSetup:
             duration_seconds: Credential validity duration (default: 1 hour)
             
         Returns:
-            Dict with AccessKeyId, SecretAccessKey, SessionToken
+            Dict with AccessKeyId, SecretAccessKey, SessionToken and Expiration
         """
         console.print(f"[cyan]Getting temporary AWS credentials (valid for {duration_seconds//60} minutes)...[/cyan]")
         
         try:
-            response = self.sts_client.get_session_token(
-                DurationSeconds=duration_seconds
-            )
-            
-            credentials = response['Credentials']
+            credentials = get_session_credentials(duration_seconds)
             console.print("[green]✓[/green] Temporary credentials obtained")
             console.print(f"[dim]Expires at: {credentials['Expiration']}[/dim]")
-            
-            return {
-                'AccessKeyId': credentials['AccessKeyId'],
-                'SecretAccessKey': credentials['SecretAccessKey'],
-                'SessionToken': credentials['SessionToken']
-            }
+            return credentials
             
         except Exception as e:
             console.print(f"[red]✗ Failed to get temporary credentials: {e}[/red]")
@@ -68,54 +80,110 @@ class ExtensionSetup:
         """
         console.print("[cyan]Downloading extension from GitHub...[/cyan]")
         
-        # For demo purposes, we'll clone the repo and build it
+        # For demo purposes, we'll download the source and build it
         # In production, you'd download a pre-built release
         import subprocess
+        import tarfile
         
         try:
-            repo_url = f"https://github.com/{self.GITHUB_REPO}.git"
             clone_dir = self.work_dir / "repo"
             
-            console.print(f"[dim]Cloning {repo_url}...[/dim]")
-            subprocess.run(
-                ["git", "clone", "--depth", "1", repo_url, str(clone_dir)],
-                check=True,
-                capture_output=True
-            )
+            # Nothing here uses git history, so fetch just the tree
+            console.print(f"[dim]Downloading {REPO_TARBALL_URL}...[/dim]")
+            try:
+                self._download_source(clone_dir)
+            except (OSError, tarfile.TarError) as e:
+                console.print(f"[yellow]⚠ Tarball download failed ({e}), falling back to git clone[/yellow]")
+                if clone_dir.exists():
+                    remove_tree_in_background(clone_dir)
+                
+                console.print(f"[dim]Cloning {REPO_URL}...[/dim]")
+                subprocess.run(
+                    ["git", "clone", "--depth", "1", REPO_URL, str(clone_dir)],
+                    check=True,
+                    capture_output=True
+                )
             
             console.print("[cyan]Building extension...[/cyan]")
-            subprocess.run(
-                ["npm", "install"],
-                cwd=clone_dir,
-                check=True,
-                capture_output=True
-            )
-            
-            subprocess.run(
-                ["npm", "run", "build"],
-                cwd=clone_dir,
-                check=True,
-                capture_output=True
-            )
+            # npm output goes to a log file rather than into Python memory;
+            # a full install logs tens of MB
+            with self.npm_log.open('wb') as log:
+                subprocess.run(
+                    npm_install_command(clone_dir),
+                    cwd=clone_dir,
+                    check=True,
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                )
+                
+                subprocess.run(
+                    ["npm", "run", "build"],
+                    cwd=clone_dir,
+                    check=True,
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                )
             
-            # Copy built extension to extension_dir
+            # Move built extension to extension_dir
             build_dir = clone_dir / "dist"  # Assuming build output is in dist/
             if not build_dir.exists():
                 build_dir = clone_dir  # Fallback to repo root
             
-            shutil.copytree(build_dir, self.extension_dir, dirs_exist_ok=True)
+            # The clone is scratch space in work_dir, so a rename (no copying)
+            # is enough; copy only if extension_dir is taken or on another device
+            try:
+                build_dir.rename(self.extension_dir)
+            except OSError:
+                shutil.copytree(build_dir, self.extension_dir, dirs_exist_ok=True)
             
+            self._built_from_source = True
             console.print("[green]✓[/green] Extension downloaded and built")
             return self.extension_dir
             
         except subprocess.CalledProcessError as e:
             console.print(f"[red]✗ Failed to build extension: {e}[/red]")
+            if e.cmd[0] == "npm":
+                self._print_npm_log_tail()
             console.print("[yellow]Tip: Make sure git and npm are installed[/yellow]")
             raise
         except Exception as e:
             console.print(f"[red]✗ Failed to download extension: {e}[/red]")
             raise
     
+    def _download_source(self, dest: Path) -> None:
+        """Stream the repository tarball straight into dest.
+        
+        The archive's top-level <repo>-<ref>/ directory is stripped; members
+        go through tarfile's 'data' filter where Python provides it.
+        
+        Args:
+            dest: Directory to extract the source tree into
+        """
+        import tarfile
+        import urllib.request
+        
+        extract_args = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+        with urllib.request.urlopen(REPO_TARBALL_URL, timeout=DOWNLOAD_TIMEOUT_SECONDS) as response, \
+                tarfile.open(fileobj=response, mode='r|gz') as tar:
+            for member in tar:
+                _, _, relative_name = member.name.partition('/')
+                if not relative_name:
+                    continue  # The top-level directory itself
+                member.name = relative_name
+                tar.extract(member, dest, **extract_args)
+    
+    def _print_npm_log_tail(self) -> None:
+        """Show the last NPM_LOG_TAIL_LINES lines of npm.log."""
+        try:
+            with self.npm_log.open('rb') as f:
+                tail = deque(f, maxlen=NPM_LOG_TAIL_LINES)
+        except OSError:
+            return
+        
+        console.print(f"[dim]Last {len(tail)} lines of {self.npm_log}:[/dim]")
+        for line in tail:
+            console.print(line.decode(errors='replace').rstrip(), markup=False, highlight=False)
+    
     def use_existing_extension(self, extension_path: Path) -> Path:
         """Use an existing extension zip or directory.
         
@@ -130,6 +198,8 @@ class ExtensionSetup:
         if extension_path.is_file() and extension_path.suffix == '.zip':
             # Extract zip
             console.print("[dim]Extracting zip file...[/dim]")
+            import zipfile
+            
             with zipfile.ZipFile(extension_path, 'r') as zip_ref:
                 zip_ref.extractall(self.extension_dir)
         elif extension_path.is_dir():
@@ -139,6 +209,7 @@ class ExtensionSetup:
         else:
             raise ValueError(f"Invalid extension path: {extension_path}")
         
+        self._built_from_source = False
         console.print("[green]✓[/green] Extension loaded")
         return self.extension_dir
     
@@ -165,61 +236,49 @@ class ExtensionSetup:
         
         console.print(f"[dim]Extension: {manifest.get('name', 'Unknown')} v{manifest.get('version', '?')}[/dim]")
         
+        # Serialized once, shared by the popup.js and popup.html snippets
+        literal = credentials_literal(credentials)
+        
         # Find and modify popup.js to inject credentials
         popup_js_path = self.extension_dir / "popup.js"
         if popup_js_path.exists():
-            with open(popup_js_path, 'r') as f:
-                popup_js = f.read()
+            popup_js = popup_js_path.read_bytes()
             
             # Inject credentials at the beginning of the file
-            credentials_injection = f"""
-// Auto-injected AWS credentials
-(function() {{
-    const credentials = {{
-        accessKeyId: '{credentials['AccessKeyId']}',
-        secretAccessKey: '{credentials['SecretAccessKey']}',
-        sessionToken: '{credentials['SessionToken']}'
-    }};
-    localStorage.setItem('keys', JSON.stringify(credentials));
-    console.log('AWS credentials auto-configured');
-}})();
-
-"""
-            popup_js = credentials_injection + popup_js
-            
-            with open(popup_js_path, 'w') as f:
-                f.write(popup_js)
+            credentials_injection = (
+                "\n// Auto-injected AWS credentials\n"
+                + credentials_snippet(literal, 'AWS credentials auto-configured')
+                + "\n"
+            )
+            write_atomic(popup_js_path, [credentials_injection.encode(), popup_js])
             
             console.print("[green]✓[/green] Credentials injected into popup.js")
         
         # Also modify popup.html to inject credentials
         popup_html_path = self.extension_dir / "popup.html"
         if popup_html_path.exists():
-            with open(popup_html_path, 'r') as f:
-                popup_html = f.read()
+            popup_html = popup_html_path.read_bytes()
             
             # Inject script at the beginning of body
-            credentials_script = f"""<script>
-// Auto-configure AWS credentials
-(function() {{
-    const credentials = {{
-        accessKeyId: '{credentials['AccessKeyId']}',
-        secretAccessKey: '{credentials['SecretAccessKey']}',
-        sessionToken: '{credentials['SessionToken']}'
-    }};
-    localStorage.setItem('keys', JSON.stringify(credentials));
-    console.log('AWS credentials configured from popup.html');
-}})();
-</script>
-"""
-            
-            # Insert after <body> tag
-            popup_html = popup_html.replace('<body>', '<body>\n' + credentials_script)
-            
-            with open(popup_html_path, 'w') as f:
-                f.write(popup_html)
+            credentials_script = (
+                "<script>\n// Auto-configure AWS credentials\n"
+                + credentials_snippet(literal, 'AWS credentials configured from popup.html')
+                + "</script>\n"
+            )
             
-            console.print("[green]✓[/green] Credentials injected into popup.html")
+            # Insert after the first <body> tag, writing the pieces in sequence
+            body_end = popup_html.find(b'<body>')
+            if body_end >= 0:
+                body_end += len(b'<body>')
+                popup_view = memoryview(popup_html)
+                write_atomic(popup_html_path, [
+                    popup_view[:body_end],
+                    b'\n',
+                    credentials_script.encode(),
+                    popup_view[body_end:]
+                ])
+                
+                console.print("[green]✓[/green] Credentials injected into popup.html")
         
         console.print("[green]✓[/green] AWS credentials configured")
         console.print(f"[dim]Credentials will be auto-loaded when extension starts[/dim]")
@@ -241,12 +300,12 @@ class ExtensionSetup:
             output_path = Path(f"bedrock-summary-extension-{timestamp}.zip")
         
         # Create zip file
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(self.extension_dir):
-                for file in files:
-                    file_path = Path(root) / file
-                    arcname = file_path.relative_to(self.extension_dir)
-                    zipf.write(file_path, arcname)
+        zip_directory(
+            self.extension_dir,
+            output_path,
+            compress=self.compress,
+            skip_dev_files=self._built_from_source
+        )
         
         file_size = output_path.stat().st_size / 1024 / 1024  # MB
         console.print(f"[green]✓[/green] Extension packaged: {output_path}")
@@ -260,13 +319,18 @@ class ExtensionSetup:
     def prepare_extension(
         self,
         existing_extension: Optional[Path] = None,
-        skip_credentials: bool = False
+        skip_credentials: bool = False,
+        credentials: Optional[Dict[str, str]] = None,
+        output_path: Optional[Path] = None
     ) -> Path:
         """Complete extension preparation workflow.
         
         Args:
             existing_extension: Path to existing extension (downloads if None)
             skip_credentials: Skip credential configuration
+            credentials: Temporary credentials to inject (fetched from STS if
+                None), so several extensions can share one set
+            output_path: Output zip file path (auto-generated if None)
             
         Returns:
             Path to packaged extension zip
@@ -281,13 +345,14 @@ class ExtensionSetup:
         
         # Step 2: Get and configure credentials
         if not skip_credentials:
-            credentials = self.get_temporary_credentials()
+            if credentials is None:
+                credentials = self.get_temporary_credentials()
             self.configure_extension_credentials(credentials)
         else:
             console.print("[yellow]Skipping credential configuration[/yellow]")
         
         # Step 3: Package extension
-        zip_path = self.package_extension()
+        zip_path = self.package_extension(output_path)
         
         console.print("\n[green]✓ Extension preparation complete![/green]\n")
         return zip_path
@@ -295,7 +360,7 @@ class ExtensionSetup:
     def cleanup(self):
         """Clean up temporary files."""
         if self.work_dir.exists():
-            shutil.rmtree(self.work_dir)
+            remove_tree_in_background(self.work_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Tests for browser_with_extension."""
+
+import time
+import unittest
+from unittest import mock
+
+import boto3
+from botocore.stub import Stubber
+
+from browser_with_extension import (
+    BROWSER_IDENTIFIER,
+    SESSION_TIMEOUT_SECONDS,
+    BrowserWithExtension,
+)
+
+EXTENSION_URI = 's3://test-bucket/extensions/abc.zip'
+
+
+class CreateBrowserSessionTest(unittest.TestCase):
+    """create_browser_session() sends requests that pass param validation.
+    
+    The clientToken botocore generates is not visible to expected_params,
+    but it is validated against the model like every other parameter.
+    """
+    
+    def setUp(self):
+        session = boto3.Session(
+            aws_access_key_id='testing',
+            aws_secret_access_key='testing',
+            region_name='us-east-1'
+        )
+        self.browser = BrowserWithExtension(region='us-east-1', boto3_session=session, quiet=True)
+        self.stubber = Stubber(self.browser.agentcore_client)
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+    
+    def _expect_start(self, session_name: str, session_id: str):
+        self.stubber.add_response('start_browser_session', {
+            'browserIdentifier': BROWSER_IDENTIFIER,
+            'sessionId': session_id,
+            'createdAt': '2026-01-01T00:00:00Z'
+        }, {
+            'browserIdentifier': BROWSER_IDENTIFIER,
+            'name': session_name,
+            'sessionTimeoutSeconds': SESSION_TIMEOUT_SECONDS,
+            'extensions': [{'location': {'s3': {'bucket': 'test-bucket', 'prefix': 'extensions/abc.zip'}}}]
+        })
+    
+    def test_create_browser_session(self):
+        self._expect_start('demo', 'session-1')
+        
+        result = self.browser.create_browser_session([EXTENSION_URI], session_name='demo')
+        
+        self.assertEqual(result['session_id'], 'session-1')
+        self.assertEqual(self.browser.session_id, 'session-1')
+        self.stubber.assert_no_pending_responses()
+    
+    def test_sessions_keep_request_order(self):
+        def start_session(session_name, extensions):
+            # The first request finishes last
+            time.sleep(0.2 if session_name == 'first' else 0)
+            return f"id-{session_name}"
+        
+        with mock.patch.object(self.browser, '_start_session', side_effect=start_session):
+            results = self.browser.create_browser_sessions([
+                {'extension_s3_uris': [EXTENSION_URI], 'session_name': name}
+                for name in ('first', 'second', 'third')
+            ])
+        
+        self.assertEqual([result['session_id'] for result in results], ['id-first', 'id-second', 'id-third'])
+        self.assertEqual(
+            [session['session_id'] for session in self.browser.sessions],
+            ['id-first', 'id-second', 'id-third']
+        )
+        self.assertEqual(self.browser.session_id, 'id-third')
+
+
+if __name__ == "__main__":
+    unittest.main()
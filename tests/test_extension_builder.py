@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Tests for extension_builder."""
+
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from extension_builder import zip_directory
+
+
+class ZipDirectoryTest(unittest.TestCase):
+    """zip_directory() writes valid archives with every file's contents."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.source = self.root / "extension"
+        self.files = {
+            "manifest.json": b'{"manifest_version": 3}',
+            "popup.js": b"console.log('popup');\n" * 2000,
+            "icons/icon.png": os.urandom(4096),
+            "lib/sdk.js": os.urandom(1024) + b"x" * 50000,
+        }
+        for name, data in self.files.items():
+            path = self.source / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+    
+    def _assert_valid_zip(self, output: Path, expected: dict):
+        with zipfile.ZipFile(output) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual({name: zipf.read(name) for name in zipf.namelist()}, expected)
+    
+    def test_round_trip(self):
+        output = self.root / "out.zip"
+        
+        added = zip_directory(self.source, output)
+        
+        self.assertEqual(added, len(self.files))
+        self._assert_valid_zip(output, self.files)
+        with zipfile.ZipFile(output) as zipf:
+            self.assertEqual(zipf.getinfo("icons/icon.png").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zipf.getinfo("popup.js").compress_type, zipfile.ZIP_DEFLATED)
+    
+    def test_entries_past_zip64_limit(self):
+        output = self.root / "out.zip"
+        
+        # Offsets and sizes past the limit, so later entries need ZIP64 fields
+        with mock.patch.object(zipfile, "ZIP64_LIMIT", 1000):
+            zip_directory(self.source, output)
+        
+        self._assert_valid_zip(output, self.files)
+    
+    def test_skip_dev_files(self):
+        (self.source / ".env").write_bytes(b"SECRET=1")
+        (self.source / "popup.js.map").write_bytes(b"{}")
+        (self.source / "node_modules" / "dep").mkdir(parents=True)
+        (self.source / "node_modules" / "dep" / "index.js").write_bytes(b"")
+        output = self.root / "out.zip"
+        
+        zip_directory(self.source, output, skip_dev_files=True)
+        
+        self._assert_valid_zip(output, self.files)
+
+
+if __name__ == "__main__":
+    unittest.main()
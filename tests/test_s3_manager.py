@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Tests for s3_manager."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from botocore.stub import ANY, Stubber
+
+from s3_manager import (
+    CONTENT_SHA256_METADATA,
+    MAX_TRANSFER_CONCURRENCY,
+    S3Manager,
+    build_transfer_config,
+    file_sha256,
+)
+
+# TransferConfig options the CRT transfer client accepts; anything else set
+# explicitly makes boto3 raise InvalidCrtTransferConfigError (mirrors
+# boto3.crt._ALLOWED_CRT_TRANSFER_CONFIG_OPTIONS, which needs awscrt to import)
+ALLOWED_CRT_OPTIONS = {
+    'multipart_threshold',
+    'max_concurrency',
+    'max_request_concurrency',
+    'multipart_chunksize',
+    'preferred_transfer_client',
+}
+
+
+class BuildTransferConfigTest(unittest.TestCase):
+    """build_transfer_config() must produce configs the transfer clients accept."""
+    
+    def test_crt_config_sets_only_crt_options(self):
+        config = build_transfer_config(use_crt=True)
+        
+        self.assertEqual(config.preferred_transfer_client, 'crt')
+        self.assertEqual(config.max_concurrency, MAX_TRANSFER_CONCURRENCY)
+        explicitly_set = {
+            option for option in config.DEFAULTS
+            if config.get_deep_attr(option) is not config.UNSET_DEFAULT
+        }
+        self.assertLessEqual(explicitly_set, ALLOWED_CRT_OPTIONS)
+    
+    def test_classic_config_uses_threads(self):
+        config = build_transfer_config(use_crt=False)
+        
+        self.assertEqual(config.preferred_transfer_client, 'auto')
+        self.assertTrue(config.use_threads)
+
+
+class UploadExtensionTest(unittest.TestCase):
+    """upload_extension() dedups on content, whatever the zip is called."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.manager = S3Manager('test-bucket', region='us-east-1', prewarm=False)
+        self.stubber = Stubber(self.manager.s3_client)
+        self.addCleanup(self.stubber.deactivate)
+    
+    def _write_zip(self, name: str) -> Path:
+        path = Path(self.tmp_dir.name) / name
+        path.write_bytes(b"PK\x05\x06" + b"\x00" * 18)  # Empty zip
+        return path
+    
+    def test_same_contents_under_new_name_skip_upload(self):
+        first = self._write_zip("bedrock-summary-extension-1000-1.zip")
+        second = self._write_zip("bedrock-summary-extension-2000-1.zip")
+        digest = file_sha256(first)
+        key = f"extensions/{digest}.zip"
+        
+        self.stubber.add_client_error('head_object', http_status_code=404, expected_params={
+            'Bucket': 'test-bucket', 'Key': key
+        })
+        self.stubber.add_response('put_object', {}, {
+            'Bucket': 'test-bucket', 'Key': key, 'Body': ANY,
+            'ContentType': 'application/zip', 'CacheControl': ANY, 'Metadata': ANY
+        })
+        self.stubber.add_response('head_object', {'Metadata': {CONTENT_SHA256_METADATA: digest}}, {
+            'Bucket': 'test-bucket', 'Key': key
+        })
+        self.stubber.activate()
+        
+        self.assertEqual(self.manager.upload_extension(first), f"s3://test-bucket/{key}")
+        self.assertEqual(self.manager.upload_extension(second), f"s3://test-bucket/{key}")
+        self.stubber.assert_no_pending_responses()
+
+
+if __name__ == "__main__":
+    unittest.main()